@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# Checks the hand-entered section times in main_points/*.json against the recordings: decodes
+# each interview's audio in a single streaming pass (ffmpeg, fixed-size chunks, so a 90 MB file
+# never sits in memory), finds the silences in its loudness curve, and reports for every main
+# point and every transcript timestamp the nearest speech onset after a silence, plus the
+# nearest speaker turn from the transcript. Main points whose start_time and display_time
+# disagree are flagged. Nothing is modified; the report is for editing the JSON by hand.
+#
+# Usage: analyze_audio_boundaries.py [page_id ...] [--threshold-db -40] [--min-silence 0.4]
+import sys
+import math
+import json
+import argparse
+import subprocess
+from bisect import bisect_left
+
+import audio_pipeline
+import transcript_model
+import make_html14_multilingual_scroll_text as site
+
+# Loudness is measured over 50 ms frames of 8 kHz mono
+SAMPLE_RATE = 8000
+FRAME_SECONDS = 0.05
+
+def frame_loudness(src_path):
+    """Yield (start seconds, RMS in dBFS) for each frame of the recording."""
+    frame_samples = int(SAMPLE_RATE * FRAME_SECONDS)
+    for index, samples in enumerate(audio_pipeline.decoded_frames(src_path, SAMPLE_RATE, frame_samples)):
+        rms = math.sqrt(math.sumprod(samples, samples) / len(samples)) if samples else 0
+        yield index * FRAME_SECONDS, 20 * math.log10(rms / 32768) if rms else -120.0
+
+def find_silences(src_path, threshold_db, min_silence):
+    """(start, end) of every stretch at least min_silence long that stays below threshold_db."""
+    silences = []
+    start = None
+    end = 0.0
+    for time, loudness in frame_loudness(src_path):
+        end = time + FRAME_SECONDS
+        if loudness < threshold_db:
+            if start is None:
+                start = time
+        else:
+            if start is not None and time - start >= min_silence:
+                silences.append((start, time))
+            start = None
+    if start is not None and end - start >= min_silence:
+        silences.append((start, end))
+    return silences
+
+def nearest(times, seconds, window):
+    """Index of the entry of sorted times closest to seconds, if within window."""
+    i = bisect_left(times, seconds)
+    candidates = [k for k in (i - 1, i) if 0 <= k < len(times)]
+    if not candidates:
+        return None
+    best = min(candidates, key=lambda k: abs(times[k] - seconds))
+    return best if abs(times[best] - seconds) <= window else None
+
+def boundary_report(seconds, onsets, turns, window):
+    entry = {}
+    k = nearest(onsets, seconds, window)
+    if k is not None:
+        entry["onset"] = round(onsets[k], 2)
+        entry["onset_delta"] = round(onsets[k] - seconds, 2)
+    k = nearest([time for time, _ in turns], seconds, window)
+    if k is not None:
+        entry["turn"] = turns[k][0]
+        entry["turn_speaker"] = turns[k][1]
+        entry["turn_delta"] = turns[k][0] - seconds
+    return entry
+
+def analyze_page(conf, args):
+    page_id = conf["page_id"]
+    speakers = site.page_speakers(conf)
+    report = {"page_id": page_id, "audio_file": conf["audio_file"], "silences": None, "main_points": [],
+              "timestamps": []}
+
+    onsets = []
+    if audio_pipeline.FFMPEG is None:
+        print("ffmpeg is not installed; reporting transcript boundaries only.", file=sys.stderr)
+    else:
+        try:
+            silences = find_silences(conf["audio_file"], args.threshold_db, args.min_silence)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Could not decode {conf['audio_file']}: {e}", file=sys.stderr)
+        else:
+            report["silences"] = len(silences)
+            # Speech resumes where a silence ends: that is where a section would start
+            onsets = [end for _, end in silences]
+
+    transcripts = [("es", conf.get("spanish_transcript_file"), site.main_points_es_dict.get(page_id, [])),
+                   ("en", conf.get("transcript_file"), site.main_points_dict.get(page_id, []))]
+    for lang, transcript, points in transcripts:
+        model = transcript_model.load_transcript(transcript, speakers) if transcript else None
+        turns = transcript_model.speaker_turns(model) if model else []
+        for mp in points:
+            display_seconds = transcript_model.timestamp_to_seconds(mp.get("display_time", ""))
+            entry = {"lang": lang, "id": mp["id"], "start_time": mp["start_time"],
+                     "display_time": mp.get("display_time")}
+            if display_seconds is not None and display_seconds != mp["start_time"]:
+                entry["display_mismatch"] = display_seconds - mp["start_time"]
+            entry.update(boundary_report(mp["start_time"], onsets, turns, args.window))
+            report["main_points"].append(entry)
+        if model:
+            for seconds in transcript_model.timestamps(model):
+                entry = {"lang": lang, "time": seconds}
+                entry.update(boundary_report(seconds, onsets, turns, args.window))
+                report["timestamps"].append(entry)
+    return report
+
+def format_time(seconds):
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+def describe(entry):
+    parts = []
+    if "onset" in entry:
+        parts.append(f"onset {entry['onset']:.2f}s ({entry['onset_delta']:+.2f})")
+    if "turn" in entry:
+        parts.append(f"turn to {entry['turn_speaker']} at {entry['turn']}s ({entry['turn_delta']:+g})")
+    return ", ".join(parts) or "no boundary nearby"
+
+def print_report(report):
+    silences = "not analyzed" if report["silences"] is None else f"{report['silences']} silences"
+    print(f"== {report['page_id']} ({report['audio_file']}: {silences})")
+    for entry in report["main_points"]:
+        flag = ""
+        if "display_mismatch" in entry:
+            flag = f"  !! display_time {entry['display_time']} is {entry['display_mismatch']:+g}s off"
+        print(f"  [{entry['lang']}] {entry['id']} @ {entry['start_time']}s: {describe(entry)}{flag}")
+    print("  Transcript timestamps:")
+    for entry in report["timestamps"]:
+        print(f"    [{entry['lang']}] {format_time(entry['time'])}: {describe(entry)}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Report the nearest silence and speaker boundaries for each main point and "
+                    "transcript timestamp.")
+    parser.add_argument("page_ids", nargs="*", help="pages to analyze (default: all in config.json)")
+    parser.add_argument("--threshold-db", type=float, default=-40.0,
+                        help="frames quieter than this RMS level (dBFS) count as silence")
+    parser.add_argument("--min-silence", type=float, default=0.4,
+                        help="shortest pause, in seconds, that counts as a boundary")
+    parser.add_argument("--window", type=float, default=10.0,
+                        help="only report boundaries within this many seconds")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    configs = [conf for conf in site.config_dict.values()
+               if not args.page_ids or conf["page_id"] in args.page_ids]
+    reports = [analyze_page(conf, args) for conf in configs]
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+    else:
+        for report in reports:
+            print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# Build-time audio stages for make_html14_multilingual_scroll_text.py:
+#   - section clips: slices each interview's recording at its main points' start_time
+#     boundaries into one clip per section, so a TOC click on a slow connection fetches only the
+#     section it plays instead of seeking in a 90 MB MP3;
+#   - HLS ladder: transcodes each recording into a few AAC bitrates, segmented into short fMP4
+#     chunks with a master playlist, so players can pick a rendition to suit the connection;
+#   - waveform peaks: decodes each recording once into a small binary file of min/max sample
+#     pairs, so pages can draw a timeline without decoding the MP3 in the browser.
+#
+# Outputs are content-addressed like the derived images: names carry a hash of the source bytes
+# and of the settings that produced them, so unchanged recordings are never processed again and
+# changed ones can never be served from stale files.
+import os
+import sys
+import json
+import struct
+import shutil
+import subprocess
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from build_cache import digest, source_hash, load_cache_index, prune_derived
+
+# ffmpeg is optional: without it the pages keep playing the single full-length file.
+FFMPEG = shutil.which("ffmpeg")
+# ffprobe (shipped with ffmpeg) caps the HLS ladder at each recording's own bitrate
+FFPROBE = shutil.which("ffprobe")
+
+DERIVED_DIR = os.path.join("audio", "derived")
+# Source hash + boundaries -> clip list, so cached recordings don't need probing
+CACHE_INDEX = os.path.join(DERIVED_DIR, "index.json")
+
+# --- HLS bitrate ladder (mono AAC-LC, kbps) for audio/hls/<recording>-<hash>/ ---
+# Speech needs no more; rungs above the recording's own bitrate are capped to it, since they
+# would only add bytes
+HLS_DIR = os.path.join("audio", "hls")
+HLS_BITRATES = (48, 96)
+HLS_CHANNELS = 1
+HLS_SEGMENT_SECONDS = 6
+HLS_CODECS = "mp4a.40.2"
+HLS_MASTER = "master.m3u8"
+
+# --- Waveform peaks for the page timeline, in audio/peaks/ ---
+# File layout (little-endian): magic b"PEAK", uint16 buckets per second, uint32 bucket count,
+# then one (min, max) pair of int8 per bucket, scaled from 16-bit samples.
+PEAKS_DIR = os.path.join("audio", "peaks")
+PEAKS_MAGIC = b"PEAK"
+PEAKS_HEADER = struct.Struct("<4sHI")
+PEAKS_PER_SECOND = 2
+PEAKS_SAMPLE_RATE = 8000  # decoded mono rate; plenty for an envelope
+
+# Bytes read from ffmpeg's decoded output at a time
+DECODE_CHUNK_BYTES = 1 << 20
+
+def clip_path(src_path, src_hash, start, end):
+    stem, ext = os.path.splitext(os.path.basename(src_path))
+    return os.path.join(DERIVED_DIR, f"{stem}-{digest(src_hash, start, end)}{ext}")
+
+def cut_clip(src_path, out_path, start, end):
+    """Copy [start, end) seconds of src_path into out_path; end None means to the end (pool worker)."""
+    tmp_path = f"{out_path}.{os.getpid()}.tmp{os.path.splitext(out_path)[1]}"
+    cmd = [FFMPEG, "-v", "error", "-y", "-ss", str(start), "-i", src_path]
+    if end is not None:
+        cmd += ["-t", str(end - start)]
+    cmd += ["-map", "0:a", "-c", "copy", tmp_path]
+    try:
+        subprocess.run(cmd, check=True)
+        os.replace(tmp_path, out_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def section_clips(src_path, src_hash, boundaries):
+    # One clip per section: from each boundary to the next, the last one to the end
+    ends = boundaries[1:] + [None]
+    return [
+        {"start": start, "end": end,
+         "src": clip_path(src_path, src_hash, start, end).replace(os.sep, "/")}
+        for start, end in zip(boundaries, ends)
+    ]
+
+def build_audio_clips(recordings, jobs=1):
+    """recordings: key -> (audio file, section start times). Returns key -> clip list."""
+    if FFMPEG is None:
+        print("ffmpeg is not installed; skipping audio clips.", file=sys.stderr)
+        return {}
+
+    os.makedirs(DERIVED_DIR, exist_ok=True)
+    index = load_cache_index(CACHE_INDEX)
+    new_index = {}
+    cache_keys = {}
+    for key, (src_path, starts) in recordings.items():
+        if not os.path.exists(src_path):
+            print(f"Audio not found, skipping: {src_path}", file=sys.stderr)
+            continue
+        # The first clip always starts at 0, whatever the first section's start_time
+        boundaries = sorted({0, *starts})
+        src_hash = source_hash(src_path)
+        cache_key = cache_keys[key] = digest(src_hash, boundaries)
+        new_index[cache_key] = index.get(cache_key) or section_clips(src_path, src_hash, boundaries)
+
+    pending = {}
+    for key, cache_key in cache_keys.items():
+        for clip in new_index[cache_key]:
+            if not os.path.exists(clip["src"]):
+                pending[clip["src"]] = (recordings[key][0], clip["start"], clip["end"])
+
+    if pending:
+        print(f"Cutting {len(pending)} audio clip(s)...")
+        srcs, starts, ends = zip(*pending.values())
+        if jobs > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as pool:
+                list(pool.map(cut_clip, srcs, list(pending), starts, ends))
+        else:
+            list(map(cut_clip, srcs, list(pending), starts, ends))
+
+    with open(CACHE_INDEX, "w", encoding="utf-8") as f:
+        json.dump(new_index, f, indent=2)
+    # Drop clips no page refers to any more (replaced recordings, moved sections)
+    prune_derived(DERIVED_DIR, [CACHE_INDEX] + [clip["src"] for clips in new_index.values() for clip in clips])
+
+    return {key: new_index[cache_key] for key, cache_key in cache_keys.items()}
+
+def hls_settings():
+    # Everything that affects a ladder; part of its directory name
+    return {"bitrates": HLS_BITRATES, "channels": HLS_CHANNELS, "segment": HLS_SEGMENT_SECONDS,
+            "codecs": HLS_CODECS}
+
+def source_kbps(src_path):
+    """The recording's overall bitrate in kbps, or None if ffprobe can't tell."""
+    if FFPROBE is None:
+        return None
+    result = subprocess.run(
+        [FFPROBE, "-v", "error", "-show_entries", "format=bit_rate", "-of", "default=nw=1:nk=1", src_path],
+        capture_output=True, text=True,
+    )
+    try:
+        return int(result.stdout.strip()) // 1000
+    except ValueError:
+        return None
+
+def ladder_bitrates(src_path):
+    # Each rung capped at the source bitrate (rungs that end up equal are encoded once)
+    kbps = source_kbps(src_path)
+    if kbps is None:
+        return list(HLS_BITRATES)
+    return sorted({min(rung, kbps) for rung in HLS_BITRATES})
+
+def transcode_rendition(src_path, out_dir, kbps):
+    """Encode one rung of the ladder as fMP4 segments and a media playlist in out_dir (pool worker)."""
+    os.makedirs(out_dir, exist_ok=True)
+    subprocess.run([
+        FFMPEG, "-v", "error", "-y", "-i", src_path, "-map", "0:a", "-ac", str(HLS_CHANNELS),
+        "-c:a", "aac", "-b:a", f"{kbps}k",
+        "-f", "hls", "-hls_time", str(HLS_SEGMENT_SECONDS), "-hls_playlist_type", "vod",
+        "-hls_segment_type", "fmp4", "-hls_fmp4_init_filename", "init.mp4",
+        "-hls_segment_filename", os.path.join(out_dir, "seg%05d.m4s"),
+        os.path.join(out_dir, "index.m3u8"),
+    ], check=True)
+
+def master_playlist(bitrates):
+    # Declared bandwidth includes some headroom for the fMP4 container overhead
+    lines = ["#EXTM3U", "#EXT-X-VERSION:7", "#EXT-X-INDEPENDENT-SEGMENTS"]
+    for kbps in bitrates:
+        lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={kbps * 1100},CODECS="{HLS_CODECS}"')
+        lines.append(f"{kbps}k/index.m3u8")
+    return "\n".join(lines) + "\n"
+
+def build_hls_ladders(audio_files, jobs=1):
+    """Returns audio file -> master playlist path for every recording that could be encoded."""
+    if FFMPEG is None:
+        print("ffmpeg is not installed; skipping HLS audio.", file=sys.stderr)
+        return {}
+
+    os.makedirs(HLS_DIR, exist_ok=True)
+    ladders = {}
+    pending = []
+    for src_path in dict.fromkeys(audio_files):
+        if not os.path.exists(src_path):
+            print(f"Audio not found, skipping: {src_path}", file=sys.stderr)
+            continue
+        stem = os.path.splitext(os.path.basename(src_path))[0]
+        out_dir = os.path.join(HLS_DIR, f"{stem}-{digest(source_hash(src_path), hls_settings())}")
+        # The master playlist is written last, so its presence marks a complete ladder
+        if not os.path.exists(os.path.join(out_dir, HLS_MASTER)):
+            pending.append(out_dir)
+        ladders[src_path] = out_dir
+
+    if pending:
+        print(f"Encoding {len(pending)} HLS ladder(s)...")
+        # Renditions are encoded into a staging directory that replaces the ladder when complete
+        for out_dir in pending:
+            if os.path.exists(out_dir + ".tmp"):
+                shutil.rmtree(out_dir + ".tmp")
+        if FFPROBE is None:
+            print("ffprobe is not installed; HLS rungs are not capped at the source bitrate.",
+                  file=sys.stderr)
+        sources = {out_dir: src for src, out_dir in ladders.items()}
+        bitrates = {out_dir: ladder_bitrates(sources[out_dir]) for out_dir in pending}
+        tasks = [(sources[out_dir], os.path.join(out_dir + ".tmp", f"{kbps}k"), kbps)
+                 for out_dir in pending for kbps in bitrates[out_dir]]
+        if jobs > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+                list(pool.map(transcode_rendition, *zip(*tasks)))
+        else:
+            list(map(transcode_rendition, *zip(*tasks)))
+        for out_dir in pending:
+            with open(os.path.join(out_dir + ".tmp", HLS_MASTER), "w", encoding="utf-8") as f:
+                f.write(master_playlist(bitrates[out_dir]))
+            if os.path.exists(out_dir):
+                shutil.rmtree(out_dir)
+            os.replace(out_dir + ".tmp", out_dir)
+
+    # Drop ladders no page refers to any more
+    prune_derived(HLS_DIR, ladders.values())
+
+    return {src: os.path.join(out_dir, HLS_MASTER).replace(os.sep, "/") for src, out_dir in ladders.items()}
+
+def hls_files(master_path):
+    # Every file of a ladder: master and media playlists, init and media segments
+    ladder_dir = os.path.dirname(master_path)
+    return [
+        os.path.join(root, name).replace(os.sep, "/")
+        for root, _, names in os.walk(ladder_dir) for name in names
+    ]
+
+def peaks_settings():
+    return {"per_second": PEAKS_PER_SECOND, "rate": PEAKS_SAMPLE_RATE, "format": PEAKS_HEADER.format}
+
+def decoded_frames(src_path, sample_rate, frame_samples):
+    """Decode src_path to mono 16-bit samples with ffmpeg, yielding arrays of frame_samples
+    samples (the last one possibly shorter). Only one pipe chunk is in memory at a time."""
+    frame_bytes = 2 * frame_samples
+    proc = subprocess.Popen(
+        [FFMPEG, "-v", "error", "-i", src_path, "-map", "0:a", "-ac", "1",
+         "-ar", str(sample_rate), "-f", "s16le", "-"],
+        stdout=subprocess.PIPE,
+    )
+    try:
+        pending = b""
+        for chunk in iter(lambda: proc.stdout.read(DECODE_CHUNK_BYTES), b""):
+            pending += chunk
+            usable = len(pending) - len(pending) % frame_bytes
+            for offset in range(0, usable, frame_bytes):
+                yield samples_from(pending[offset:offset + frame_bytes])
+            pending = pending[usable:]
+        if len(pending) >= 2:
+            yield samples_from(pending[:len(pending) - len(pending) % 2])
+    finally:
+        proc.stdout.close()
+        if proc.wait() != 0:
+            raise subprocess.CalledProcessError(proc.returncode, proc.args)
+
+def samples_from(data):
+    samples = array("h", data)
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return samples
+
+def compute_peaks(src_path, out_path):
+    """Stream-decode src_path and write its min/max peaks file (pool worker)."""
+    peaks = array("b")
+    for samples in decoded_frames(src_path, PEAKS_SAMPLE_RATE, PEAKS_SAMPLE_RATE // PEAKS_PER_SECOND):
+        peaks.extend((min(samples) >> 8, max(samples) >> 8))
+
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(PEAKS_HEADER.pack(PEAKS_MAGIC, PEAKS_PER_SECOND, len(peaks) // 2))
+        f.write(peaks.tobytes())
+    os.replace(tmp_path, out_path)
+
+def build_waveform_peaks(audio_files, jobs=1):
+    """Returns audio file -> peaks file path for every recording that could be decoded."""
+    if FFMPEG is None:
+        print("ffmpeg is not installed; skipping waveform peaks.", file=sys.stderr)
+        return {}
+
+    os.makedirs(PEAKS_DIR, exist_ok=True)
+    peaks = {}
+    for src_path in dict.fromkeys(audio_files):
+        if not os.path.exists(src_path):
+            print(f"Audio not found, skipping: {src_path}", file=sys.stderr)
+            continue
+        stem = os.path.splitext(os.path.basename(src_path))[0]
+        peaks[src_path] = os.path.join(
+            PEAKS_DIR, f"{stem}-{digest(source_hash(src_path), peaks_settings())}.peaks"
+        )
+
+    pending = {src: out for src, out in peaks.items() if not os.path.exists(out)}
+    if pending:
+        print(f"Computing waveform peaks for {len(pending)} recording(s)...")
+        if jobs > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as pool:
+                list(pool.map(compute_peaks, pending.keys(), pending.values()))
+        else:
+            list(map(compute_peaks, pending.keys(), pending.values()))
+
+    prune_derived(PEAKS_DIR, peaks.values())
+
+    return {src: out.replace(os.sep, "/") for src, out in peaks.items()}
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# Content hashing and cache bookkeeping shared by make_html14_multilingual_scroll_text.py and its
+# image and audio stages: file hashes (remembered across builds by size and mtime, so the 90 MB
+# recordings are read once rather than by every stage of every build), the short digests that
+# content-addressed output names carry, and the index/prune helpers for derived-file directories.
+import os
+import json
+import shutil
+import hashlib
+
+# path -> [size, mtime_ns, sha256] of every source hashed through source_hash
+HASH_CACHE = ".asset_hashes.json"
+hash_cache = None
+
+def digest(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(json.dumps(part, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+def hash_file(path):
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    except FileNotFoundError:
+        return None
+    return h.hexdigest()
+
+def source_hash(path):
+    """sha256 of path, reused from HASH_CACHE while the file's size and mtime are unchanged."""
+    global hash_cache
+    if hash_cache is None:
+        hash_cache = load_cache_index(HASH_CACHE)
+    stat = os.stat(path)
+    cached = hash_cache.get(path)
+    if cached and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+        return cached[2]
+    hash_cache[path] = [stat.st_size, stat.st_mtime_ns, hash_file(path)]
+    with open(HASH_CACHE, "w", encoding="utf-8") as f:
+        json.dump(hash_cache, f, indent=2, sort_keys=True)
+    return hash_cache[path][2]
+
+def load_cache_index(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def prune_derived(directory, keep):
+    # Drop every file or directory in directory that keep doesn't list (replaced sources, old
+    # settings)
+    keep = {os.path.normpath(path) for path in keep}
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if os.path.normpath(path) in keep:
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
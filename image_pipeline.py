@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# Build-time image stage for make_html14_multilingual_scroll_text.py: derives smaller files from
+# the photos listed in images.json (gallery thumbnails and responsive width/format variants) and
+# returns an image catalog (images.json entries plus the paths of the derived files) for the
+# generated pages and gallery manifest.
+#
+# Derived files are content-addressed: each name carries a hash of the source bytes and the
+# transform that produced it, so unchanged photos are never re-encoded and a changed photo or
+# setting can never be served from a stale file. Missing outputs are rendered in a process pool.
+import os
+import sys
+import json
+import base64
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+
+from build_cache import digest, source_hash, load_cache_index, prune_derived
+
+# Pillow is optional: without it the catalog is images.json unchanged and pages keep loading the
+# original files.
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+DERIVED_DIR = os.path.join("images", "derived")
+# Source hash + settings -> catalog fields, so cached photos don't even need decoding
+CACHE_INDEX = os.path.join(DERIVED_DIR, "index.json")
+
+# --- Responsive variants for #current-image and #gallery-full ---
+VARIANT_WIDTHS = (480, 960, 1600)
+# (mime type, Pillow format, extension, save options); modern formats only if this Pillow has an encoder
+MODERN_FORMATS = (
+    ("image/avif", "AVIF", ".avif", {"quality": 55}),
+    ("image/webp", "WEBP", ".webp", {"quality": 78, "method": 6}),
+)
+JPEG_OPTIONS = {"quality": 82, "optimize": True, "progressive": True}
+PNG_OPTIONS = {"optimize": True}
+
+# --- Gallery thumbnails (shown at 80x60 with object-fit: cover, so 2x for high-DPI screens) ---
+THUMB_SIZE = (160, 120)
+THUMB_OPTIONS = {"quality": 80, "optimize": True, "progressive": True}
+
+# --- Placeholders shown (and space reserved) while the real image streams in ---
+PLACEHOLDER_WIDTH = 16
+PLACEHOLDER_OPTIONS = {"quality": 50, "optimize": True}
+
+def modern_formats():
+    return [fmt for fmt in MODERN_FORMATS if features.check(fmt[1].lower())]
+
+def transform_settings():
+    # Everything that affects the derived files; part of every photo's cache key
+    return {
+        "widths": VARIANT_WIDTHS,
+        "formats": modern_formats(),
+        "jpeg": JPEG_OPTIONS,
+        "png": PNG_OPTIONS,
+        "thumb": [THUMB_SIZE, THUMB_OPTIONS],
+        "placeholder": [PLACEHOLDER_WIDTH, PLACEHOLDER_OPTIONS],
+        "pillow": Image.__version__,
+    }
+
+def variant_widths(width):
+    # Every configured width below the original, plus the original capped at the largest width
+    widths = [w for w in VARIANT_WIDTHS if w < width]
+    widths.append(min(width, VARIANT_WIDTHS[-1]))
+    return sorted(set(widths))
+
+def has_alpha(img):
+    # Many of the scanned PNGs carry an alpha channel that is fully opaque; only real
+    # transparency needs a PNG fallback.
+    if img.mode not in ("RGBA", "LA") and not (img.mode == "P" and "transparency" in img.info):
+        return False
+    return img.convert("RGBA").getchannel("A").getextrema()[0] < 255
+
+def flatten(img):
+    # Flatten transparency onto white, the gallery's background
+    background = Image.new("RGB", img.size, (255, 255, 255))
+    background.paste(img, mask=img.getchannel("A"))
+    return background
+
+def resized(img, width):
+    if width == img.width:
+        return img
+    return img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+
+def derived_path(src_path, src_hash, transform, ext):
+    stem = os.path.splitext(os.path.basename(src_path))[0]
+    return os.path.join(DERIVED_DIR, f"{stem}-{digest(src_hash, transform)}{ext}")
+
+def save_derived(img, out_path, pil_format, options):
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    img.save(tmp_path, pil_format, **options)
+    os.replace(tmp_path, out_path)
+
+def placeholder_fields(img):
+    # A tiny blurred-by-upscaling JPEG as a data URI, plus the average color for anything that
+    # can't show it
+    opaque = flatten(img) if img.mode == "RGBA" else img
+    buf = BytesIO()
+    resized(opaque, min(PLACEHOLDER_WIDTH, opaque.width)).save(buf, "JPEG", **PLACEHOLDER_OPTIONS)
+    r, g, b = opaque.resize((1, 1), Image.BOX).getpixel((0, 0))
+    return {
+        "placeholder": "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode("ascii"),
+        "color": f"#{r:02x}{g:02x}{b:02x}",
+    }
+
+def process_image(src_path, src_hash):
+    """Render the derived files for one photo and return its catalog fields (pool worker)."""
+    img = ImageOps.exif_transpose(Image.open(src_path))
+    # Transparent images keep a PNG fallback; everything else (including PNG photos) becomes JPEG
+    if has_alpha(img):
+        img = img.convert("RGBA")
+        fallback = ("PNG", ".png", PNG_OPTIONS)
+    else:
+        img = img.convert("RGB")
+        fallback = ("JPEG", ".jpg", JPEG_OPTIONS)
+
+    def srcset(pil_format, ext, options):
+        candidates = []
+        for width in variant_widths(img.width):
+            out_path = derived_path(src_path, src_hash, [pil_format, width, options], ext)
+            # Content-addressed, so an existing file is already the right one
+            if not os.path.exists(out_path):
+                save_derived(resized(img, width), out_path, pil_format, options)
+            candidates.append(f"{out_path.replace(os.sep, '/')} {width}w")
+        return ", ".join(candidates)
+
+    fields = {
+        "width": img.width,
+        "height": img.height,
+        **placeholder_fields(img),
+        "sources": [{"type": mime, "srcset": srcset(pil_format, ext, options)}
+                    for mime, pil_format, ext, options in modern_formats()],
+        "srcset": srcset(*fallback),
+    }
+
+    thumb_path = derived_path(src_path, src_hash, ["thumb", THUMB_SIZE, THUMB_OPTIONS], ".jpg")
+    if not os.path.exists(thumb_path):
+        opaque = flatten(img) if img.mode == "RGBA" else img
+        save_derived(ImageOps.fit(opaque, THUMB_SIZE, Image.LANCZOS), thumb_path, "JPEG", THUMB_OPTIONS)
+    fields["thumb"] = thumb_path.replace(os.sep, "/")
+    return fields
+
+def derived_files(fields):
+    paths = [fields["thumb"]]
+    for srcset in [fields["srcset"]] + [source["srcset"] for source in fields["sources"]]:
+        paths.extend(candidate.split(" ")[0] for candidate in srcset.split(", "))
+    return paths
+
+def build_image_catalog(image_dict, jobs=1):
+    if Image is None:
+        print("Pillow is not installed; skipping image processing.", file=sys.stderr)
+        return image_dict
+
+    os.makedirs(DERIVED_DIR, exist_ok=True)
+    settings = transform_settings()
+    index = load_cache_index(CACHE_INDEX)
+    new_index = {}
+    pending = {}
+    cache_keys = {}
+    for key, entry in image_dict.items():
+        if not os.path.exists(entry["src"]):
+            print(f"Image not found, skipping: {entry['src']}", file=sys.stderr)
+            continue
+        src_hash = source_hash(entry["src"])
+        cache_key = cache_keys[key] = digest(src_hash, settings)
+        fields = index.get(cache_key)
+        if fields and all(os.path.exists(path) for path in derived_files(fields)):
+            new_index[cache_key] = fields
+        elif cache_key not in new_index:
+            pending[cache_key] = (entry["src"], src_hash)
+
+    if pending:
+        print(f"Processing {len(pending)} image(s)...")
+        srcs, src_hashes = zip(*pending.values())
+        if jobs > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as pool:
+                results = list(pool.map(process_image, srcs, src_hashes))
+        else:
+            results = list(map(process_image, srcs, src_hashes))
+        new_index.update(zip(pending, results))
+
+    with open(CACHE_INDEX, "w", encoding="utf-8") as f:
+        json.dump(new_index, f, indent=2)
+    # Drop derived files no catalog entry refers to any more
+    prune_derived(DERIVED_DIR, [CACHE_INDEX] + [path for fields in new_index.values() for path in derived_files(fields)])
+
+    catalog = {}
+    for key, entry in image_dict.items():
+        entry = dict(entry)
+        if key in cache_keys:
+            entry.update(new_index[cache_keys[key]])
+        catalog[key] = entry
+    return catalog
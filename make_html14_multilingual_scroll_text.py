@@ -3,6 +3,24 @@ import re
 import sys
 import json
 import os
+import argparse
+import hashlib
+import shutil
+import gzip
+from array import array
+from itertools import pairwise
+from concurrent.futures import ProcessPoolExecutor
+
+import build_cache
+import image_pipeline
+import audio_pipeline
+import transcript_model
+
+# brotli is optional: without it --compress writes gzip siblings only
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # --- Load JSON Data from External Files ---
 with open("config.json", "r", encoding="utf-8") as f:
@@ -34,113 +52,198 @@ for key, conf in config_dict.items():
 with open("images.json", "r", encoding="utf-8") as f:
     image_dict = json.load(f)
 
-# --- Regular Expression for Timestamp Lines ---
-timestamp_re = re.compile(r"^\d+:\d{2}:\d{2}$")
-
-def timestamp_to_seconds(ts_str):
-    parts = ts_str.strip().split(":")
-    if len(parts) != 3:
-        return None
-    try:
-        hours, minutes, seconds = map(int, parts)
-        return hours * 3600 + minutes * 60 + seconds
-    except ValueError:
-        return None
+# images.json plus the files derived by the image stage (thumbnails); replaced by main()
+image_catalog = image_dict
+
+# Shared stylesheet and runtime script referenced by every page, fingerprinted by content so
+# browsers can cache them across interviews. Sources live in static/; main() writes the bundles
+# and fills in their paths.
+STATIC_DIR = "static"
+ASSET_DIR = "assets"
+asset_bundles = {"css": "", "js": ""}
+
+# --fingerprint-assets: images and audio are published under content-hashed copies in
+# assets/media/ so they can be cached indefinitely. asset_urls maps each logical path (as
+# written in config.json/images.json) to its copy; empty means pages use the logical paths.
+MEDIA_DIR = ASSET_DIR + "/media"
+ASSET_MANIFEST = "asset-manifest.json"
+# Cache-Control rules for hosts that read a _headers file (Netlify, Cloudflare Pages)
+HEADERS_FILE = "_headers"
+IMMUTABLE_PATHS = (
+    "/assets/*", "/images/derived/*", "/audio/derived/*", "/audio/hls/*", "/audio/peaks/*",
+)
+asset_urls = {}
+
+# --split-audio: page_id -> the recording cut into one clip per section ({start, end, src});
+# pages without clips play the single audio_file.
+audio_clips = {}
+# --hls: audio_file -> master playlist of its bitrate ladder, preferred by the page runtime
+# where the browser can play it
+audio_hls = {}
+# --waveform: audio_file -> its precomputed peaks file, drawn as a clickable timeline
+audio_peaks = {}
+
+# Shown in the left column until the first section's image replaces it
+DEFAULT_IMAGE = "images/ester_as_young_woman.jpg"
+
+def asset_url(path):
+    return asset_urls.get(path, path)
+
+# Speaker registry: name -> {"color": ..., optional "class": ...}. A config.json entry may add
+# or override speakers for its own interview with a "speakers" object of the same shape.
+with open("speakers.json", "r", encoding="utf-8") as f:
+    speaker_registry = json.load(f)
+
+# Archive-wide image catalog for the gallery popup, written once per build and fetched by the
+# page only when the gallery is opened.
+GALLERY_MANIFEST = "gallery.json"
+
+def page_images(main_points_list_en, main_points_list_es):
+    # Only the images this interview's main points refer to, in images.json order
+    used = {mp["image"] for mp in main_points_list_en + main_points_list_es if "image" in mp}
+    return {key: entry for key, entry in image_catalog.items() if key in used}
+
+def section_start_times():
+    # page_id -> (audio file, every main point's start_time in both languages): where the
+    # audio clips are cut
+    recordings = {}
+    for conf in config_dict.values():
+        pid = conf["page_id"]
+        points = main_points_dict.get(pid, []) + main_points_es_dict.get(pid, [])
+        recordings[pid] = (conf["audio_file"], [mp["start_time"] for mp in points])
+    return recordings
+
+def section_lookup_tables(main_points_list_en, main_points_list_es):
+    # id -> the fields the page runtime looks up, and image -> the section showing it. Spanish
+    # points win over English ones with the same id/image, as in the page's TOC default.
+    sections_by_id = {}
+    section_by_image = {}
+    for mp in main_points_list_es + main_points_list_en:
+        if mp["id"] not in sections_by_id:
+            sections_by_id[mp["id"]] = {
+                key: mp[key] for key in ("start_time", "image", "title") if key in mp
+            }
+        if "image" in mp:
+            section_by_image.setdefault(mp["image"], mp["id"])
+    return sections_by_id, section_by_image
+
+def image_section_order(sections_by_id, images):
+    # Ids of the sections that show an image, by start_time (ties keep TOC order), for
+    # prev/next navigation and preloading
+    return [
+        section_id
+        for section_id, section in sorted(sections_by_id.items(), key=lambda item: item[1]["start_time"])
+        if section.get("image") in images
+    ]
+
+# --- Speakers whose name at the start of a line gets styled ---
+def page_speakers(config):
+    speakers = dict(speaker_registry)
+    for name, entry in config.get("speakers", {}).items():
+        speakers[name] = {**speakers.get(name, {}), **entry}
+    return speakers
+
+def speaker_class(name, entry):
+    return entry.get("class") or "speaker-" + re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+def speaker_css(speakers):
+    return "\n".join(
+        f".{speaker_class(name, entry)} {{\n  color: {entry['color']};\n  font-weight: bold;\n}}"
+        for name, entry in speakers.items()
+    )
 
 # === Function to Process a Transcript File (inserts anchors and formats timestamps) ===
-def process_transcript(file_path, main_points_list):
-    output_lines = []
+def process_transcript(file_path, main_points_list, speakers, id_prefix, timestamps):
+    # Single pass over the transcript's classified lines, streamed from the file by
+    # transcript_model, yielding each rendered line together with any section anchors that
+    # precede it, so the page writer can stream it straight to disk. Each timestamp link's time
+    # is appended to timestamps (an array; the link's id is id_prefix and its position) for the
+    # audio-to-transcript sync index.
     mp_index = 0
-    with open(file_path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-    for line in lines:
-        stripped = line.strip()
-        if timestamp_re.match(stripped) and mp_index < len(main_points_list):
-            current_time = timestamp_to_seconds(stripped)
+
+    def anchor(point):
+        return f'<div id="{point["id"]}" class="section-anchor"></div>\n'
+
+    for kind, line, value in transcript_model.iter_transcript(file_path, speakers):
+        if kind == transcript_model.LINE_TIMESTAMP:
+            ts = value
+            current_time = transcript_model.timestamp_to_seconds(ts)
             while (
                 mp_index < len(main_points_list)
                 and current_time is not None
                 and current_time >= main_points_list[mp_index]["start_time"]
             ):
-                anchor_html = f'<div id="{main_points_list[mp_index]["id"]}" class="section-anchor"></div>\n'
-                output_lines.append(anchor_html)
+                yield anchor(main_points_list[mp_index])
                 mp_index += 1
-        output_lines.append(line)
+            # Make timestamp-only lines clickable
+            link_id = f"{id_prefix}-{len(timestamps)}"
+            timestamps.append(current_time)
+            yield (
+                f'<a href="#" id="{link_id}" class="timestamp" '
+                f'onclick="jumpToTime({current_time}); return false;">{ts}</a>'
+                + line[len(ts):]
+            )
+        elif kind == transcript_model.LINE_SPEAKER:
+            # Wrap speaker names (for styling)
+            name = value
+            yield f'<span class="{speaker_class(name, speakers[name])}">{name}</span>' + line[len(name):]
+        else:
+            yield line
+
     # If there are any anchors left (points with no matching timestamps in text), append them at the end
     while mp_index < len(main_points_list):
-        anchor_html = f'<div id="{main_points_list[mp_index]["id"]}" class="section-anchor"></div>\n'
-        output_lines.append(anchor_html)
+        yield anchor(main_points_list[mp_index])
         mp_index += 1
 
-    processed = "".join(output_lines)
-
-    # Wrap speaker names (for styling)
-    processed = re.sub(
-        r"^(Rosita)", r'<span class="speaker-rosita">\1</span>',
-        processed, flags=re.MULTILINE
-    )
-    processed = re.sub(
-        r"^(Lali)", r'<span class="speaker-lali">\1</span>',
-        processed, flags=re.MULTILINE
-    )
-    processed = re.sub(
-        r"^(Ruby)", r'<span class="speaker-ruby">\1</span>',
-        processed, flags=re.MULTILINE
-    )
-    processed = re.sub(
-        r"^(Jaime)", r'<span class="speaker-jaime">\1</span>',
-        processed, flags=re.MULTILINE
-    )
-    processed = re.sub(
-        r"^(Marita)", r'<span class="speaker-marita">\1</span>',
-        processed, flags=re.MULTILINE
-    )
-    processed = re.sub(
-        r"^(Eric)", r'<span class="speaker-eric">\1</span>',
-        processed, flags=re.MULTILINE
+def timestamp_index_json(timestamps, id_prefix):
+    # The [seconds, link id] pairs by time (ties in transcript order), as JSON, pair by pair.
+    # Transcripts are normally already in time order, which needs no sorted copy.
+    if all(a <= b for a, b in pairwise(timestamps)):
+        order = range(len(timestamps))
+    else:
+        order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+    for n, i in enumerate(order):
+        yield ("," if n else "") + f'[{timestamps[i]},"{id_prefix}-{i}"]'
+
+def toc_entry(mp, lang):
+    return (
+        f'                    <li><a href="#{mp["id"]}" id="link-{mp["id"]}-{lang}" '
+        f'onclick="jumpToSection(\'{mp["id"]}\', {mp["start_time"]}); return false;">'
+        f'{mp["title"]} ({mp["display_time"]})</a></li>\n'
     )
 
-    # Make timestamp-only lines clickable
-    def timestamp_link(match):
-        ts = match.group(1)
-        seconds = timestamp_to_seconds(ts)
-        return (
-            f'<a href="#" class="timestamp" '
-            f'onclick="jumpToTime({seconds}); return false;">{ts}</a>'
-        )
-
-    processed = re.sub(
-        r"^(\d+:\d{2}:\d{2})$",
-        timestamp_link,
-        processed,
-        flags=re.MULTILINE
+def transcript_has_text(file_path, speakers, main_points_list):
+    # Whether the rendered transcript has anything but whitespace: the section anchors, which
+    # are emitted for every main point, or any non-blank line (read up to the first one)
+    return file_path is not None and (
+        bool(main_points_list)
+        or any(kind != transcript_model.LINE_BLANK
+               for kind, _, _ in transcript_model.iter_transcript(file_path, speakers))
     )
 
-    return processed
-
 # === Function to Generate a Single HTML Page with Navigation, Image, TOC, Transcript Toggle, and a Floating Gallery ===
 def generate_page_with_nav(config, main_points_list_en, main_points_list_es, all_configs):
     page_id = config["page_id"]
+    speakers = page_speakers(config)
 
-    # === Process transcripts (English and Spanish) ===
-    if "spanish_transcript_file" in config:
-        processed_sp = process_transcript(
-            config["spanish_transcript_file"], main_points_list_es
-        )
-    else:
-        processed_sp = ""
-
-    if "transcript_file" in config:
-        processed_en = process_transcript(
-            config["transcript_file"], main_points_list_en
-        )
-    else:
-        processed_en = ""
+    # === Transcripts (English and Spanish); streamed from their files while the page is written ===
+    transcript_sp = config.get("spanish_transcript_file")
+    transcript_en = config.get("transcript_file")
+    timestamps_sp, timestamps_en = array("q"), array("q")
 
     # Only show the transcript-toggle buttons if both English and Spanish exist
-    has_en = bool(processed_en.strip())
-    has_sp = bool(processed_sp.strip())
+    has_en = transcript_has_text(transcript_en, speakers, main_points_list_en)
+    has_sp = transcript_has_text(transcript_sp, speakers, main_points_list_es)
     show_transcript_toggle = has_en and has_sp
+    # The visible transcript goes straight into the <pre>; the other language is parked once in
+    # an inert <template> and swapped in by showTranscript().
+    initial_transcript = "spanish" if has_sp else "english"
+    if transcript_sp is not None and (os.path.getsize(transcript_sp) or main_points_list_es):
+        pre_transcript = process_transcript(transcript_sp, main_points_list_es, speakers, "ts-es", timestamps_sp)
+    elif transcript_en is not None:
+        pre_transcript = process_transcript(transcript_en, main_points_list_en, speakers, "ts-en", timestamps_en)
+    else:
+        pre_transcript = iter(())
 
     # === Build the navigation bar ===
     nav_links = []
@@ -158,337 +261,53 @@ def generate_page_with_nav(config, main_points_list_en, main_points_list_es, all
     nav_block = "".join(nav_links)
 
     # === JSON for images, TOC, and transcript ===
-    section_images_json = json.dumps(image_dict)
-    main_en_json = json.dumps(main_points_list_en)
-    main_es_json = json.dumps(main_points_list_es)
-    transcript_en_json = json.dumps(processed_en)
-    transcript_sp_json = json.dumps(processed_sp)
-
-    # === Build HTML content using only f-strings ===
-    html_content = f"""<!DOCTYPE html>
+    section_images = page_images(main_points_list_en, main_points_list_es)
+    sections_by_id, section_by_image = section_lookup_tables(main_points_list_en, main_points_list_es)
+    clips = audio_clips.get(page_id, [])
+    page_data = {
+        "sectionImages": section_images,
+        "galleryManifest": GALLERY_MANIFEST,
+        "mainPointsEn": main_points_list_en,
+        "mainPointsEs": main_points_list_es,
+        "sectionsById": sections_by_id,
+        "sectionByImage": section_by_image,
+        "imageSections": image_section_order(sections_by_id, section_images),
+        "sectionOrder": [
+            section_id
+            for section_id, _ in sorted(sections_by_id.items(), key=lambda item: item[1]["start_time"])
+        ],
+        # Streamed into the page data once the transcripts have filled in the times
+        "timestampIndex": None,
+        "initialTranscript": initial_transcript,
+        "audioFile": asset_url(config["audio_file"]),
+        "audioClips": clips,
+        "audioHls": audio_hls.get(config["audio_file"], ""),
+        "waveformPeaks": audio_peaks.get(config["audio_file"], ""),
+    }
+    # Speakers this interview adds or restyles on top of the shared stylesheet
+    speaker_overrides = {
+        name: entry for name, entry in speakers.items() if speaker_registry.get(name) != entry
+    }
+    page_style = (
+        f"    <style>\n{speaker_css(speaker_overrides)}\n    </style>\n" if speaker_overrides else ""
+    )
+
+    # With a ladder the runtime chooses the source, so the fallback file isn't fetched up front
+    audio_preload = ' preload="none"' if page_data["audioHls"] else ""
+    # Timeline under the player, drawn by the runtime from the precomputed peaks
+    waveform_block = '    <canvas id="waveform"></canvas>\n' if page_data["waveformPeaks"] else ""
+
+    # === Write the page as it is rendered: head, nav and player, TOCs, transcripts, then the
+    # page data (whose timestamp index the transcripts fill in) ===
+    def page_chunks():
+        yield f"""<!DOCTYPE html>
 <html>
 <head>
     <meta charset="utf-8">
     <title>{config["page_title"]}</title>
-    <style>
-/* Global Styles */
-body {{
-  font-family: 'Roboto', sans-serif;
-  margin: 20px;
-  background-color: #f0f2f5;
-  color: #333;
-}}
-
-/* Navigation Bar styled as flat buttons */
-#nav {{
-  display: flex;
-  justify-content: center;
-  gap: 0;
-  margin-bottom: 5px;
-  border-bottom: 1px solid #e0e0e0;
-}}
-.nav-link {{
-  flex: 1;
-  padding: 5px 5px;
-  text-align: center;
-  font-size: 0.85em;
-  text-decoration: none;
-  color: #555;
-  background-color: #ffffff;
-  border-right: 1px solid #e0e0e0;
-  transition: background-color 0.3s, color 0.3s;
-}}
-.nav-link:last-child {{
-  border-right: none;
-}}
-.nav-link:hover {{
-  background-color: #e9eff5;
-  color: #222;
-}}
-.nav-link.selected {{
-  background-color: #007acc;
-  color: #ffffff;
-  pointer-events: none;
-}}
-
-/* Audio Player */
-audio {{
-  width: 100%;
-  margin-bottom: 10px;
-  max-height: 20px;
-}}
-
-/* Main Container for Two Vertical Columns */
-#main-container {{
-  display: flex;
-  gap: 12px;
-  height: calc(90vh - 130px);
-}}
-
-/* Left Column: Buttons, Image Subtitle, Image, TOC, and TOC Toggle */
-#left-column {{
-  width: 50%;
-  display: flex;
-  flex-direction: column;
-  height: 100%;
-  background-color: #ffffff;
-  border-radius: 4px;
-  overflow: hidden;
-  box-shadow: 0 2px 8px rgba(0, 0, 0, 0.1);
-}}
-#buttons {{
-  text-align: center;
-  margin: 2px 0;
-}}
-#buttons button {{
-  display: inline-block;
-  background-color: rgba(255, 255, 255, 0.8);
-  border: none;
-  cursor: pointer;
-  font-size: 1.2em;
-  color: #007acc;
-  padding: 2px 5px;
-  transition: background-color 0.3s, color 0.3s;
-  margin: 0 2px;
-}}
-#buttons button:hover {{
-  background-color: rgba(150, 150, 150, 0.8);
-  color: gray;
-}}
-#buttons button:active {{
-  background-color: rgba(100, 100, 100, 0.8);
-  color: darkgray;
-}}
-#image-subtitle {{
-  margin-top: 10px;
-  font-size: 0.7em;
-  color: #555;
-  text-align: center;
-}}
-#image-container {{
-  height: 55%;
-  position: relative;
-  overflow: hidden;
-  display: flex;
-  justify-content: center;
-  align-items: center;
-  background-color: #ffffff;
-  padding-bottom: 2px;
-}}
-#image-container img {{
-  max-height: 100%;
-  max-width: 100%;
-  object-fit: contain;
-}}
-
-/* TOC Toggle Buttons */
-#toc-toggle {{
-  text-align: center;
-  margin: 5px 0;
-}}
-#toc-toggle button {{
-  margin: 0 5px;
-  padding: 6px 12px;
-  background-color: #007acc;
-  color: #fff;
-  border: none;
-  border-radius: 4px;
-  cursor: pointer;
-  transition: background-color 0.3s;
-}}
-#toc-toggle button:hover {{
-  background-color: #005fa3;
-}}
-
-/* TOC Containers */
-#toc-title {{
-  font-size: 0.7em;
-  text-align: center;
-  border-top: 1px solid #e0e0e0;
-}}
-.toc-container {{
-  height: 34%;
-  overflow-y: auto;
-  background-color: #fafafa;
-  border-top: 1px solid #e0e0e0;
-  padding: 10px;
-}}
-.toc-container h2 {{
-  margin: 0 0 10px 0;
-  font-size: 1.2em;
-  color: #007acc;
-}}
-.toc-container ul {{
-  list-style: none;
-  padding: 0;
-  margin: 0;
-}}
-.toc-container li {{
-  margin-bottom: 8px;
-}}
-.toc-container a {{
-  text-decoration: none;
-  color: #555;
-  transition: color 0.3s;
-}}
-.toc-container a:hover {{
-  color: #007acc;
-}}
-
-/* Right Column: Transcript (toggle shown conditionally) */
-#right-column {{
-  font-family: 'Roboto';
-  width: 50%;
-  background-color: #ffffff;
-  border-radius: 4px;
-  box-shadow: 0 2px 8px rgba(0, 0, 0, 0.08);
-  overflow-y: auto;
-  padding: 15px;
-}}
-#transcript-toggle {{
-  text-align: center;
-  margin-bottom: 10px;
-}}
-#transcript-toggle button {{
-  margin: 0 5px;
-  padding: 8px 15px;
-  background-color: #007acc;
-  color: #fff;
-  border: none;
-  border-radius: 4px;
-  cursor: pointer;
-  transition: background-color 0.3s;
-}}
-#transcript-toggle button:hover {{
-  background-color: #005fa3;
-}}
-#transcript-content pre {{
-  white-space: pre-wrap;
-  font-size: 1em;
-  line-height: 1.6;
-}}
-
-/* Anchor Div Styling */
-.section-anchor {{
-  padding-top: 60px;
-  margin-top: -60px;
-}}
-
-/* Speaker Name Styling */
-.speaker-jaime {{
-  color: #ff7a00;
-  font-weight: bold;
-}}
-.speaker-marita {{
-  color: #0077ab;
-  font-weight: bold;
-}}
-.speaker-rosita {{
-  color: #007acc;
-  font-weight: bold;
-}}
-.speaker-eric {{
-  color: #228b22;
-  font-weight: bold;
-}}
-.speaker-ruby {{
-  color: #998b88;
-  font-weight: bold;
-}}
-.speaker-lali {{
-  color: #ff0000;
-  font-weight: bold;
-}}
-
-/* Timestamp Styling */
-.timestamp {{
-  font-family: 'Roboto', sans-serif;
-  font-weight: bold;
-  color: #333;
-  cursor: pointer;
-  transition: color 0.3s;
-}}
-.timestamp:hover {{
-  color: #007acc;
-}}
-
-/* Floating Gallery Popup */
-#gallery-popup {{
-  display: none;
-  position: fixed;
-  top: 10%;
-  left: 10%;
-  width: 80%;
-  height: 80%;
-  background-color: #fff;
-  border: 2px solid #007acc;
-  box-shadow: 0 4px 16px rgba(0, 0, 0, 0.2);
-  z-index: 1000;
-  padding: 10px;
-  overflow: hidden;
-}}
-#gallery-close {{
-  position: absolute;
-  top: 5px;
-  right: 10px;
-  font-size: 1.5em;
-  cursor: pointer;
-  color: #007acc;
-}}
-#gallery-close:hover {{
-  color: darkgray;
-}}
-#gallery-content {{
-  display: flex;
-  height: 100%;
-}}
-#gallery-full-pane {{
-  flex: 2;
-  display: flex;
-  flex-direction: column;
-  align-items: center;
-  justify-content: center;
-  border-right: 1px solid #e0e0e0;
-  padding: 10px;
-}}
-#gallery-full-pane img {{
-  max-width: 100%;
-  max-height: 70%;
-  object-fit: contain;
-}}
-#gallery-full-pane #gallery-full-title {{
-  margin-top: 5px;
-  font-size: 1.2em;
-  font-weight: bold;
-}}
-#gallery-full-pane #gallery-full-subtitle {{
-  margin-top: 3px;
-  font-size: 0.9em;
-  color: #555;
-}}
-#gallery-thumbs-pane {{
-  flex: 1;
-  overflow-y: auto;
-  padding: 5px;
-}}
-#gallery-thumbs-pane img {{
-  width: 80px;
-  height: 60px;
-  object-fit: cover;
-  margin: 3px 0;
-  cursor: pointer;
-  border: 2px solid transparent;
-  transition: border 0.3s;
-}}
-#gallery-thumbs-pane img.selected {{
-  border: 2px solid #007acc;
-}}
-#acknowledgements {{
-  font-size: 0.6em;
-  padding-bottom: 2px;
-}}
-    </style>
-    <link href="https://fonts.googleapis.com/css?family=Roboto&display=swap" rel="stylesheet">
+    <link rel="stylesheet" href="{asset_bundles["css"]}">
+{page_style}    <link href="https://fonts.googleapis.com/css?family=Roboto&display=swap" rel="stylesheet">
+    <script src="{asset_bundles["js"]}" defer></script>
 </head>
 <body>
     <span style="font-size: 12pt;"><u><b>Recuerdos y Cuentos de la Familia:</b> <span>{config["page_title"]}</span></u></span>
@@ -505,17 +324,17 @@ audio {{
     <!-- Navigation Block -->
     <div id="nav">{nav_block}</div>
     <!-- Audio Player -->
-    <audio id="audioPlayer" controls>
-        <source src="{config["audio_file"]}" type="audio/mpeg">
+    <audio id="audioPlayer" controls{audio_preload}>
+        <source src="{clips[0]["src"] if clips else asset_url(config["audio_file"])}" type="audio/mpeg">
         Your browser does not support the audio element.
     </audio>
-    <!-- Main Container with Two Columns -->
+{waveform_block}    <!-- Main Container with Two Columns -->
     <div id="main-container">
         <!-- Left Column: Image Controls, Image, TOC Toggle, TOC, and Gallery Link -->
         <div id="left-column">
             <div id="image-subtitle">Ester. Ester as a young woman (1926?)</div>
             <div id="image-container">
-                <img id="current-image" src="images/ester_as_young_woman.jpg" alt="Image">
+                <picture><img id="current-image" src="{asset_url(DEFAULT_IMAGE)}" sizes="50vw" alt="Image"></picture>
             </div>
             <div id="gallery-link" style="text-align:center; margin:5px;">
                 <button onclick="openGallery()">Galeria</button>
@@ -531,14 +350,20 @@ audio {{
             <!-- Spanish TOC (visible by default) -->
             <div id="toc-es" class="toc-container">
                 <ul>
-{"".join(f'                    <li><a href="#{mp["id"]}" id="link-{mp["id"]}-es" onclick="jumpToSection(\'{mp["id"]}\', {mp["start_time"]}); return false;">{mp["title"]} ({mp["display_time"]})</a></li>\n' for mp in main_points_list_es)}
+"""
+        for mp in main_points_list_es:
+            yield toc_entry(mp, "es")
+        yield """
                 </ul>
             </div>
 
             <!-- English TOC (hidden by default) -->
             <div id="toc-en" class="toc-container" style="display:none;">
                 <ul>
-{"".join(f'                    <li><a href="#{mp["id"]}" id="link-{mp["id"]}-en" onclick="jumpToSection(\'{mp["id"]}\', {mp["start_time"]}); return false;">{mp["title"]} ({mp["display_time"]})</a></li>\n' for mp in main_points_list_en)}
+"""
+        for mp in main_points_list_en:
+            yield toc_entry(mp, "en")
+        yield f"""
                 </ul>
             </div>
         </div>
@@ -549,10 +374,24 @@ audio {{
                 <button onclick="showTranscript('spanish')">Español</button>
                 <button onclick="showTranscript('english')">English</button>
             </div>""" if show_transcript_toggle else ""}
+            <div id="follow-audio"><label><input type="checkbox" id="follow-audio-toggle" checked> Seguir el audio</label></div>
             <div id="transcript-content">
                 <pre id="transcript-pre">
-{processed_sp or processed_en}
+"""
+        yield from pre_transcript
+        yield """
                 </pre>
+                """
+        if show_transcript_toggle:
+            yield """<template id="transcript-spanish"></template>
+                <template id="transcript-english">"""
+            yield from process_transcript(transcript_en, main_points_list_en, speakers, "ts-en", timestamps_en)
+            yield "</template>"
+        # "</" is escaped so transcript or title text can never close the <script> element early
+        page_data_json = json.dumps(page_data, separators=(",", ":")).replace("</", "<\\/")
+        # Keys inside JSON strings have escaped quotes, so this only matches the real key
+        data_head, data_tail = page_data_json.split('"timestampIndex":null', 1)
+        yield f"""
             </div>
         </div>
     </div>
@@ -562,7 +401,7 @@ audio {{
         <span id="gallery-close" onclick="closeGallery()">×</span>
         <div id="gallery-content">
             <div id="gallery-full-pane">
-                <img id="gallery-full" src="" alt="Full Image">
+                <picture><img id="gallery-full" src="" sizes="55vw" alt="Full Image"></picture>
                 <div id="gallery-full-title"></div>
                 <div id="gallery-full-subtitle"></div>
             </div>
@@ -571,234 +410,410 @@ audio {{
         </div>
     </div>
 
-    <script>
-        // Global arrays/objects
-        var sectionImages = {section_images_json};
-        var mainPointsEn = {main_en_json};
-        var mainPointsEs = {main_es_json};
-
-        // Update TOC: highlight current section in whichever TOC is visible
-        function updateToc() {{
-            var currentLang = document.getElementById("toc-es").style.display === "none" ? "en" : "es";
-            var points = (currentLang === "en") ? mainPointsEn : mainPointsEs;
-            var prefix = (currentLang === "en") ? "-en" : "-es";
-            var containerId = (currentLang === "en") ? "toc-en" : "toc-es";
-            var tocContainer = document.getElementById(containerId);
-
-            points.forEach(function(pt) {{
-                var entry = document.getElementById("link-" + pt.id + prefix);
-                if (entry) {{
-                    if (pt.id === currentSectionId) {{
-                        entry.style.color = "black";
-                        var containerRect = tocContainer.getBoundingClientRect();
-                        var entryRect = entry.getBoundingClientRect();
-                        if (entryRect.top < containerRect.top || entryRect.bottom > containerRect.bottom) {{
-                            entry.scrollIntoView({{ behavior: "smooth", block: "nearest" }});
-                        }}
-                    }} else {{
-                        entry.style.color = "gray";
-                    }}
-                }}
-            }});
-        }}
-
-        // Helper: update the gallery-full image
-        function updateGalleryImage(sectionId) {{
-            var pointEs = mainPointsEs.find(function(pt) {{ return pt.id === sectionId; }});
-            var pointEn = mainPointsEn.find(function(pt) {{ return pt.id === sectionId; }});
-            var point = pointEs || pointEn;
-            if (point && point.hasOwnProperty("image") && sectionImages.hasOwnProperty(point.image)) {{
-                document.getElementById("gallery-full").src = sectionImages[point.image].src;
-                var fullText = sectionImages[point.image].textContent;
-                var titleText = fullText.split(".")[0];
-                document.getElementById("gallery-full-title").textContent = titleText;
-                document.getElementById("gallery-full-subtitle").textContent = fullText;
-            }}
-        }}
-
-        // Next/Prev image on main page
-        function prevImage() {{
-            var combined = mainPointsEn.concat(mainPointsEs);
-            var seen = new Set();
-            var merged = [];
-            combined.forEach(function(pt) {{
-                if (!seen.has(pt.id)) {{
-                    seen.add(pt.id);
-                    merged.push(pt);
-                }}
-            }});
-            for (var i = merged.length - 1; i >= 0; i--) {{
-                if (merged[i].hasOwnProperty("image") && merged[i].id < currentSectionId) {{
-                    currentSectionId = merged[i].id;
-                    updateImageForSection(currentSectionId);
-                    updateToc();
-                    return;
-                }}
-            }}
-        }}
-
-        function nextImage() {{
-            var combined = mainPointsEn.concat(mainPointsEs);
-            var seen = new Set();
-            var merged = [];
-            combined.forEach(function(pt) {{
-                if (!seen.has(pt.id)) {{
-                    seen.add(pt.id);
-                    merged.push(pt);
-                }}
-            }});
-            for (var i = 0; i < merged.length; i++) {{
-                if (merged[i].hasOwnProperty("image") && merged[i].id > currentSectionId) {{
-                    currentSectionId = merged[i].id;
-                    updateImageForSection(currentSectionId);
-                    updateToc();
-                    return;
-                }}
-            }}
-        }}
-
-        function updateImageForSection(sectionId) {{
-            var pointEs = mainPointsEs.find(function(pt) {{ return pt.id === sectionId; }});
-            var pointEn = mainPointsEn.find(function(pt) {{ return pt.id === sectionId; }});
-            var point = pointEs || pointEn;
-            if (point && point.hasOwnProperty("image") && sectionImages.hasOwnProperty(point.image)) {{
-                document.getElementById("current-image").src = sectionImages[point.image].src;
-                document.getElementById("image-subtitle").textContent = sectionImages[point.image].textContent;
-            }}
-        }}
-
-        // TOC toggle logic
-        function showToc(lang) {{
-            if (lang === "english") {{
-                document.getElementById("toc-en").style.display = "block";
-                document.getElementById("toc-es").style.display = "none";
-            }} else {{
-                document.getElementById("toc-en").style.display = "none";
-                document.getElementById("toc-es").style.display = "block";
-            }}
-            updateToc();
-        }}
-
-        // Transcript toggle logic (only if both exist)
-        var transcriptPre = document.getElementById("transcript-pre");
-        var transcriptEnglish = {transcript_en_json};
-        var transcriptSpanish = {transcript_sp_json};
-        function showTranscript(lang) {{
-            transcriptPre.innerHTML = (lang === "english") ? transcriptEnglish : transcriptSpanish;
-        }}
-        {"/* Initialize with Spanish transcript */ showTranscript('spanish');" if show_transcript_toggle else ""}
-
-        // Audio jump function
-        function jumpToTime(seconds) {{
-            var audio = document.getElementById("audioPlayer");
-            audio.currentTime = seconds;
-            audio.play();
-        }}
-
-        // Function to jump to a section
-        function jumpToSection(sectionId, seconds) {{
-            jumpToTime(seconds);
-            var anchor = document.getElementById(sectionId);
-            if (anchor) {{
-                anchor.scrollIntoView({{ behavior: "smooth", block: "start" }});
-            }}
-            currentSectionId = sectionId;
-            updateToc();
-            updateImageForSection(currentSectionId);
-        }}
-
-        // Update TOC & image based on scroll position in transcript
-        var scrollDiv = document.getElementById("right-column");
-        if (scrollDiv) {{
-            scrollDiv.addEventListener("scroll", function() {{
-                var containerRect = scrollDiv.getBoundingClientRect();
-                var combined = mainPointsEn.concat(mainPointsEs);
-                var closestSectionId = "";
-                var minDiff = Infinity;
-                combined.forEach(function(point) {{
-                    var anchor = document.getElementById(point.id);
-                    if (anchor) {{
-                        var diff = Math.abs(anchor.getBoundingClientRect().top - containerRect.top);
-                        if (diff < minDiff) {{
-                            minDiff = diff;
-                            closestSectionId = point.id;
-                        }}
-                    }}
-                }});
-                if (closestSectionId && closestSectionId !== currentSectionId) {{
-                    currentSectionId = closestSectionId;
-                    updateToc();
-                    updateImageForSection(currentSectionId);
-                }}
-            }});
-        }}
-
-        // Current section starts at the first Spanish section if available, otherwise English
-        var currentSectionId = (mainPointsEs.length > 0) ? mainPointsEs[0].id
-                                : (mainPointsEn.length > 0) ? mainPointsEn[0].id
-                                : "";
-        // Initialize TOC & image
-        showToc("spanish");
-        updateImageForSection(currentSectionId);
-
-        // Open gallery popup
-        function openGallery() {{
-            document.getElementById("gallery-popup").style.display = "block";
-            updateGalleryImage(currentSectionId);
-            populateGalleryThumbnails();
-        }}
-
-        // Close gallery popup
-        function closeGallery() {{
-            document.getElementById("gallery-popup").style.display = "none";
-        }}
-
-        // Populate gallery thumbnails
-        function populateGalleryThumbnails() {{
-            var thumbsPane = document.getElementById("gallery-thumbs-pane");
-            thumbsPane.innerHTML = "";
-            Object.keys(sectionImages).forEach(function(key) {{
-                var imgObj = sectionImages[key];
-                var thumb = document.createElement("img");
-                thumb.src = imgObj.src;
-                thumb.onclick = function() {{
-                    document.getElementById("gallery-full").src = imgObj.src;
-                    document.getElementById("gallery-full-title").textContent = imgObj.textContent.split(".")[0];
-                    document.getElementById("gallery-full-subtitle").textContent = imgObj.textContent;
-                    var allThumbs = thumbsPane.getElementsByTagName("img");
-                    for (var i = 0; i < allThumbs.length; i++) {{
-                        allThumbs[i].classList.remove("selected");
-                    }}
-                    thumb.classList.add("selected");
-                }};
-                var currentPoint = mainPointsEs.find(function(pt) {{
-                    return pt.hasOwnProperty("image") && pt.image === key;
-                }}) || mainPointsEn.find(function(pt) {{
-                    return pt.hasOwnProperty("image") && pt.image === key;
-                }});
-                if (currentPoint && currentPoint.id === currentSectionId) {{
-                    thumb.classList.add("selected");
-                }}
-                thumbsPane.appendChild(thumb);
-            }});
-        }}
-    </script>
+    <script type="application/json" id="page-data">{data_head}"timestampIndex":{{"spanish":["""
+        yield from timestamp_index_json(timestamps_sp, "ts-es")
+        yield '],"english":['
+        yield from timestamp_index_json(timestamps_en, "ts-en")
+        yield f"""]}}{data_tail}</script>
 </body>
 </html>
 """
 
-    with open(config["output_file"], "w", encoding="utf-8") as f:
-        f.write(html_content)
+    write_atomic(config["output_file"], page_chunks())
+    return config["output_file"]
 
-    print(f"HTML file generated: {config['output_file']}")
 
+# Precompressed siblings written by --compress next to the pages, bundles and manifests
+PRECOMPRESSED_EXTS = (".gz", ".br")
 
-# === Generate Pages for All Interviews ===
-for key, conf in config_dict.items():
+def write_atomic(path, content):
+    # Write next to the target and rename over it, so a page is never seen half-written
+    # (and parallel builds never interleave into the same file). content is text, bytes, or an
+    # iterable of text chunks written as they are produced. Precompressed siblings of the old
+    # content are removed, so a server can never serve them for the new one.
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    mode, encoding = ("wb", None) if isinstance(content, bytes) else ("w", "utf-8")
+    chunks = [content] if isinstance(content, (str, bytes)) else content
+    try:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            f.writelines(chunks)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    for ext in PRECOMPRESSED_EXTS:
+        if os.path.exists(path + ext):
+            os.remove(path + ext)
+
+def write_if_changed(path, content):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    write_atomic(path, content)
+    return True
+
+def write_gallery_manifest():
+    return write_if_changed(GALLERY_MANIFEST, json.dumps(image_catalog, ensure_ascii=False, indent=2))
+
+def write_asset_bundles():
+    # static/story.css (plus the registry's speaker rules) and static/story.js, written under
+    # content-hashed names; bundles from earlier builds are removed.
+    with open(os.path.join(STATIC_DIR, "story.css"), "r", encoding="utf-8") as f:
+        css = f.read() + "\n/* Speaker Name Styling */\n" + speaker_css(speaker_registry) + "\n"
+    with open(os.path.join(STATIC_DIR, "story.js"), "r", encoding="utf-8") as f:
+        js = f.read()
+
+    os.makedirs(ASSET_DIR, exist_ok=True)
+    bundles = {}
+    for kind, content in (("css", css), ("js", js)):
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:10]
+        path = f"{ASSET_DIR}/story.{digest}.{kind}"
+        if write_if_changed(path, content):
+            print(f"Asset bundle generated: {path}")
+        bundles[kind] = path
+    for name in os.listdir(ASSET_DIR):
+        path = f"{ASSET_DIR}/{name}"
+        # Keep the current bundles' precompressed siblings too
+        base, ext = os.path.splitext(path)
+        if ext not in PRECOMPRESSED_EXTS:
+            base = path
+        if name.startswith("story.") and base not in bundles.values():
+            os.remove(path)
+    return bundles
+
+def fingerprint_assets(paths):
+    # Content hashes come from build_cache's size/mtime cache, so the 90 MB recordings aren't
+    # re-read on every build
+    os.makedirs(MEDIA_DIR, exist_ok=True)
+    urls = {}
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"Asset not found, not fingerprinted: {path}", file=sys.stderr)
+            continue
+        stem, ext = os.path.splitext(os.path.basename(path))
+        hashed_path = f"{MEDIA_DIR}/{stem}.{build_cache.source_hash(path)[:10]}{ext}"
+        if not os.path.exists(hashed_path):
+            # Hard link where the filesystem allows it; the copy is identical either way
+            try:
+                os.link(path, hashed_path)
+            except OSError:
+                shutil.copy2(path, hashed_path)
+        urls[path] = hashed_path
+
+    build_cache.prune_derived(MEDIA_DIR, urls.values())
+    return urls
+
+def write_asset_manifest():
+    # Logical name -> published name for everything with a content-hashed name
+    mapping = dict(asset_urls)
+    mapping.update({f"{STATIC_DIR}/story.{kind}": path for kind, path in asset_bundles.items()})
+    write_if_changed(ASSET_MANIFEST, json.dumps(mapping, indent=2, sort_keys=True))
+    # Only hashed paths get a rule; pages and manifests keep the host's revalidating default
+    write_if_changed(HEADERS_FILE, "".join(
+        f"{pattern}\n  Cache-Control: public, max-age=31536000, immutable\n" for pattern in IMMUTABLE_PATHS
+    ))
+
+# Pages maintained by hand rather than generated (the site's landing page), published along
+# with the local files they reference, with those references pointing at the published names.
+# References are src/href attributes and the "src" fields of inline JSON (the landing page's
+# sectionImages table).
+STATIC_PAGES = ["index.html"]
+LOCAL_REFERENCE_RE = re.compile(r'((?:src|href)="|"src":\s*")([^"#:?]+)(")')
+
+def local_references(page):
+    with open(page, "r", encoding="utf-8") as f:
+        refs = [match.group(2) for match in LOCAL_REFERENCE_RE.finditer(f.read())]
+    # Missing files are kept, so write_dist reports them
+    return [asset_url(ref) for ref in refs if not os.path.isdir(ref)]
+
+def published_page(page):
+    with open(page, "r", encoding="utf-8") as f:
+        return LOCAL_REFERENCE_RE.sub(
+            lambda m: m.group(1) + asset_url(m.group(2)) + m.group(3) if os.path.isfile(m.group(2)) else m.group(0),
+            f.read(),
+        )
+
+def published_files():
+    # Every file a deployed site needs, walked from config.json and the image catalog: pages,
+    # bundles, manifests, audio, photos and their derived variants.
+    files = [conf["output_file"] for conf in config_dict.values()]
+    for page in STATIC_PAGES:
+        files += [page] + local_references(page)
+    files += list(asset_bundles.values()) + [GALLERY_MANIFEST]
+    files += [asset_url(conf["audio_file"]) for conf in config_dict.values()]
+    files += [clip["src"] for clips in audio_clips.values() for clip in clips]
+    for master in audio_hls.values():
+        files += audio_pipeline.hls_files(master)
+    files += list(audio_peaks.values())
+    files.append(asset_url(DEFAULT_IMAGE))
+    for entry in image_catalog.values():
+        files.append(entry["src"])
+        if "thumb" in entry:
+            files += image_pipeline.derived_files(entry)
+    if asset_urls:
+        files += [ASSET_MANIFEST, HEADERS_FILE]
+    # Precompressed siblings, where the build produced them and they are still current
+    files += [path + ext for path in list(files) for ext in PRECOMPRESSED_EXTS if sibling_current(path, ext)]
+    return sorted(set(files))
+
+# GitHub Pages refuses to publish a site larger than this, so a bigger dist is an error
+DIST_SIZE_LIMIT = 10**9
+
+def contains(directory, path):
+    directory, path = os.path.realpath(directory), os.path.realpath(path)
+    return os.path.commonpath([directory, path]) == directory
+
+def write_dist(dist_dir):
+    # Assemble into a fresh staging directory and swap it in, so the deploy directory only ever
+    # holds exactly the referenced files of one complete build
+    files = published_files()
+    staging = dist_dir.rstrip("/\\") + ".tmp"
+    # Both are deleted and rebuilt, so neither may hold the source tree or a file being published
+    for target in (dist_dir, staging):
+        if contains(target, os.getcwd()) or any(contains(target, path) for path in files):
+            sys.exit(f"Refusing to replace {target}: it contains the source tree or files it publishes")
+    if os.path.exists(staging):
+        shutil.rmtree(staging)
+    # Hand-maintained pages (and their precompressed siblings) are written with rewritten
+    # references rather than linked
+    pages = {page: published_page(page).encode("utf-8") for page in STATIC_PAGES}
+    encoders = compression_encoders()
+    count = total = 0
+    for path in files:
+        if not os.path.exists(path):
+            print(f"Referenced file not found, not published: {path}", file=sys.stderr)
+            continue
+        base, ext = os.path.splitext(path)
+        if base in pages and ext in PRECOMPRESSED_EXTS and ext not in encoders:
+            continue
+        target = os.path.join(staging, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if path in pages or base in pages:
+            data = pages[path] if path in pages else encoders[ext](pages[base])
+            with open(target, "wb") as f:
+                f.write(data)
+        else:
+            try:
+                os.link(path, target)
+            except OSError:
+                shutil.copy2(path, target)
+        count += 1
+        total += os.path.getsize(target)
+    if total > DIST_SIZE_LIMIT:
+        shutil.rmtree(staging)
+        sys.exit(f"Site would be {total / 1e6:.1f} MB, over the {DIST_SIZE_LIMIT / 1e6:.0f} MB limit "
+                 f"for a published site; {dist_dir}/ not written")
+    if os.path.exists(dist_dir):
+        shutil.rmtree(dist_dir)
+    os.replace(staging, dist_dir)
+    print(f"Site written to {dist_dir}/: {count} files, {total / 1e6:.1f} MB")
+
+def text_artifacts():
+    # Everything text the site serves: pages, bundles and manifests
+    files = [conf["output_file"] for conf in config_dict.values()] + STATIC_PAGES
+    files += list(asset_bundles.values()) + [GALLERY_MANIFEST]
+    if asset_urls:
+        files.append(ASSET_MANIFEST)
+    return [path for path in files if os.path.exists(path)]
+
+def sibling_current(path, ext):
+    # A sibling newer than its source is current (unchanged outputs keep their mtime)
+    return (os.path.exists(path) and os.path.exists(path + ext)
+            and os.path.getmtime(path + ext) >= os.path.getmtime(path))
+
+def compression_encoders():
+    # Sibling extension -> maximum-compression encoder, for the encoders this build has
+    encoders = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoders[".br"] = lambda data: brotli.compress(data, quality=11, mode=brotli.MODE_TEXT)
+    return encoders
+
+def compress_file(path):
+    """Write maximum-compression .gz (and .br) siblings of one file; return the sizes (pool worker)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    sizes = {"": len(data)}
+    for ext, encode in compression_encoders().items():
+        if not sibling_current(path, ext):
+            write_atomic(path + ext, encode(data))
+        sizes[ext] = os.path.getsize(path + ext)
+    return sizes
+
+def format_sizes(sizes):
+    return ", ".join(f"{ext[1:] or 'raw'} {size / 1024:.1f} KB" for ext, size in sizes.items())
+
+def compress_artifacts(jobs):
+    if brotli is None:
+        print("brotli is not installed; writing gzip variants only.", file=sys.stderr)
+    files = text_artifacts()
+    if jobs > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(files))) as pool:
+            results = list(pool.map(compress_file, files))
+    else:
+        results = [compress_file(path) for path in files]
+
+    totals = {}
+    for path, sizes in zip(files, results):
+        print(f"Compressed {path}: {format_sizes(sizes)}")
+        for ext, size in sizes.items():
+            totals[ext] = totals.get(ext, 0) + size
+    print(f"Compressed {len(files)} file(s): {format_sizes(totals)}")
+
+def set_build_state(catalog, bundles, urls, clips, hls, peaks):
+    # Also the pool initializer, so workers render against the same catalog, bundles,
+    # fingerprinted asset names and derived audio as the parent
+    global image_catalog, asset_bundles, asset_urls, audio_clips, audio_hls, audio_peaks
+    image_catalog = catalog
+    asset_bundles = bundles
+    asset_urls = urls
+    audio_clips = clips
+    audio_hls = hls
+    audio_peaks = peaks
+
+def build_page(key):
+    # Worker entry point: page data is loaded at module import, so only the config key crosses
+    # the process boundary.
+    conf = config_dict[key]
     pid = conf["page_id"]
-    generate_page_with_nav(
+    return generate_page_with_nav(
         conf,
         main_points_dict.get(pid, []),
         main_points_es_dict.get(pid, []),
         config_dict
     )
+
+
+# === Incremental Build Manifest (content hashes of each page's inputs) ===
+BUILD_MANIFEST = ".build_manifest.json"
+
+def page_input_files(conf):
+    # Everything that can change the rendered page: its transcripts and main points,
+    # the shared image catalog and config (nav bar), and this generator and its transcript parser.
+    page_id = conf["page_id"]
+    files = [
+        os.path.join("main_points", page_id + ".json"),
+        os.path.join("main_points", page_id + "_es.json"),
+        "images.json",
+        "speakers.json",
+        "config.json",
+        os.path.abspath(__file__),
+        os.path.abspath(transcript_model.__file__),
+    ]
+    for key in ("transcript_file", "spanish_transcript_file"):
+        if key in conf:
+            files.append(conf[key])
+    return files
+
+def page_fingerprint(conf, file_hashes):
+    h = hashlib.sha256()
+    h.update(json.dumps(conf, sort_keys=True).encode("utf-8"))
+    build_state = [image_catalog, asset_bundles, asset_urls, audio_clips, audio_hls, audio_peaks]
+    h.update(json.dumps(build_state, sort_keys=True).encode("utf-8"))
+    for path in page_input_files(conf):
+        if path not in file_hashes:
+            file_hashes[path] = build_cache.hash_file(path)
+        h.update(f"{path}\0{file_hashes[path]}\n".encode("utf-8"))
+    return h.hexdigest()
+
+def load_build_manifest():
+    try:
+        with open(BUILD_MANIFEST, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_build_manifest(manifest):
+    with open(BUILD_MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+# === Generate Pages for All Interviews ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the interview pages from config.json.")
+    parser.add_argument("--force", action="store_true",
+                        help="regenerate every page even if its inputs are unchanged")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="number of worker processes (0 = one per CPU core)")
+    parser.add_argument("--fingerprint-assets", action="store_true",
+                        help="publish images and audio under content-hashed names in "
+                             f"{MEDIA_DIR}/ and write {ASSET_MANIFEST} and {HEADERS_FILE}")
+    parser.add_argument("--split-audio", action="store_true",
+                        help="cut each recording into per-section clips with ffmpeg (if installed) "
+                             f"in {audio_pipeline.DERIVED_DIR}/, so seeking only fetches one section "
+                             "(the player's own seek bar then spans one section; --hls keeps the "
+                             "whole timeline and needs no clips)")
+    parser.add_argument("--hls", action="store_true",
+                        help="encode each recording into an adaptive-bitrate mono HLS ladder with ffmpeg "
+                             f"(if installed) in {audio_pipeline.HLS_DIR}/")
+    parser.add_argument("--waveform", action="store_true",
+                        help="precompute waveform peaks with ffmpeg (if installed) in "
+                             f"{audio_pipeline.PEAKS_DIR}/ and draw a clickable timeline on each page")
+    parser.add_argument("--compress", action="store_true",
+                        help="write precompressed .gz and .br siblings of the pages, bundles and "
+                             "manifests for servers that serve them directly")
+    parser.add_argument("--dist", metavar="DIR",
+                        help="also assemble a clean deployable copy of the site (pages and the "
+                             "assets they reference only) in DIR")
+    args = parser.parse_args(argv)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    catalog = image_pipeline.build_image_catalog(image_dict, jobs)
+    urls = {}
+    if args.fingerprint_assets:
+        urls = fingerprint_assets(
+            [conf["audio_file"] for conf in config_dict.values()]
+            + [entry["src"] for entry in image_dict.values()]
+            + [DEFAULT_IMAGE]
+        )
+        catalog = {key: {**entry, "src": urls.get(entry["src"], entry["src"])} for key, entry in catalog.items()}
+    clips = audio_pipeline.build_audio_clips(section_start_times(), jobs) if args.split_audio else {}
+    audio_files = [conf["audio_file"] for conf in config_dict.values()]
+    hls = audio_pipeline.build_hls_ladders(audio_files, jobs) if args.hls else {}
+    peaks = audio_pipeline.build_waveform_peaks(audio_files, jobs) if args.waveform else {}
+    set_build_state(catalog, write_asset_bundles(), urls, clips, hls, peaks)
+    if args.fingerprint_assets:
+        write_asset_manifest()
+    if write_gallery_manifest():
+        print(f"Gallery manifest generated: {GALLERY_MANIFEST}")
+
+    manifest = {} if args.force else load_build_manifest()
+    file_hashes = {}
+    skipped = 0
+    pending = []
+    for key, conf in config_dict.items():
+        fingerprint = page_fingerprint(conf, file_hashes)
+        if manifest.get(conf["output_file"]) == fingerprint and os.path.exists(conf["output_file"]):
+            skipped += 1
+            continue
+        pending.append((key, fingerprint))
+
+    keys = [key for key, _ in pending]
+    if jobs > 1 and len(keys) > 1:
+        state = (image_catalog, asset_bundles, asset_urls, audio_clips, audio_hls, audio_peaks)
+        with ProcessPoolExecutor(max_workers=min(jobs, len(keys)), initializer=set_build_state,
+                                 initargs=state) as pool:
+            outputs = list(pool.map(build_page, keys))
+    else:
+        outputs = [build_page(key) for key in keys]
+
+    # Report and record in config order, whichever worker finished first.
+    for (key, fingerprint), output_file in zip(pending, outputs):
+        print(f"HTML file generated: {output_file}")
+        manifest[output_file] = fingerprint
+
+    save_build_manifest(manifest)
+    if skipped:
+        print(f"{skipped} page(s) up to date, skipped.")
+
+    if args.compress:
+        compress_artifacts(jobs)
+    if args.dist:
+        write_dist(args.dist)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,979 @@
+// Runtime shared by every interview page generated by make_html14_multilingual_scroll_text.py.
+// Page-specific data comes from the inline <script type="application/json" id="page-data"> blob.
+var pageData = JSON.parse(document.getElementById("page-data").textContent);
+
+// Global arrays/objects
+var sectionImages = pageData.sectionImages;
+var galleryManifestUrl = pageData.galleryManifest;
+var galleryImages = null;
+var mainPointsEn = pageData.mainPointsEn;
+var mainPointsEs = pageData.mainPointsEs;
+// Build-time lookup tables: section id -> {start_time, image, title}, image key -> section id
+var sectionsById = pageData.sectionsById;
+var sectionByImage = pageData.sectionByImage;
+// Image-bearing section ids sorted by start_time, and each one's position in that list
+var imageSections = pageData.imageSections;
+var imageSectionIndex = {};
+imageSections.forEach(function(id, i) { imageSectionIndex[id] = i; });
+// All section ids by start_time, and per transcript the [seconds, timestamp link id]
+// pairs sorted by seconds, for audio-to-transcript sync
+var sectionOrder = pageData.sectionOrder;
+var timestampIndex = pageData.timestampIndex;
+
+// Section-split audio: when the build cut the recording into per-section clips, the player
+// holds one clip at a time and interview times are mapped to (clip, offset) and back, so a
+// seek only fetches the section it lands in. Without clips the player has the full file.
+var audioPlayer = document.getElementById("audioPlayer");
+var audioClips = pageData.audioClips;
+var currentClip = 0;
+// Start fetching the next clip this many seconds before the current one ends
+var CLIP_PREFETCH_SECONDS = 15;
+var prefetchedClip = null;
+// Offset the player will start at once a new source's metadata has loaded (null when it has);
+// jumps made meanwhile update it
+var pendingOffset = null;
+
+// Position in the whole interview, whichever clip is loaded
+function audioTime() {
+    var offset = (pendingOffset !== null) ? pendingOffset : audioPlayer.currentTime;
+    return (audioClips.length ? audioClips[currentClip].start : 0) + offset;
+}
+
+function loadClip(index, offset, play) {
+    currentClip = index;
+    pendingOffset = offset;
+    audioPlayer.src = audioClips[index].src;
+    audioPlayer.addEventListener("loadedmetadata", applyPendingOffset, { once: true });
+    if (play) {
+        audioPlayer.play();
+    }
+}
+
+function applyPendingOffset() {
+    if (pendingOffset !== null) {
+        audioPlayer.currentTime = pendingOffset;
+        pendingOffset = null;
+    }
+}
+
+function clipAt(seconds) {
+    return Math.max(0, lastAtOrBefore(audioClips.length, function(k) { return audioClips[k].start; }, seconds));
+}
+
+if (audioClips.length) {
+    // Carry on into the next section's clip, fetched ahead so the switch doesn't stall
+    audioPlayer.addEventListener("timeupdate", function() {
+        var next = audioClips[currentClip + 1];
+        if (next && prefetchedClip !== next.src &&
+            audioPlayer.duration - audioPlayer.currentTime < CLIP_PREFETCH_SECONDS) {
+            prefetchedClip = next.src;
+            var prefetch = new Audio();
+            prefetch.preload = "auto";
+            prefetch.src = next.src;
+        }
+    });
+    audioPlayer.addEventListener("ended", function() {
+        if (currentClip + 1 < audioClips.length) {
+            loadClip(currentClip + 1, 0, true);
+        }
+    });
+    // A clip that can't be loaded falls back to the full recording at the same position
+    audioPlayer.addEventListener("error", function() {
+        if (audioClips.length) {
+            playFullRecording(audioTime());
+        }
+    }, true);
+}
+
+// Give the player a source covering the whole interview, resuming at the given position (and
+// playing if it was)
+function switchSource(src, seconds, play) {
+    audioClips = [];
+    currentClip = 0;
+    pendingOffset = seconds;
+    audioPlayer.src = src;
+    audioPlayer.addEventListener("loadedmetadata", applyPendingOffset, { once: true });
+    if (play) {
+        audioPlayer.play();
+    }
+}
+
+function playFullRecording(seconds) {
+    switchSource(pageData.audioFile, seconds, !audioPlayer.paused);
+}
+
+// Adaptive bitrate: when the build encoded an HLS ladder, browsers with native HLS play the
+// master playlist themselves; elsewhere a small Media Source Extensions player fetches the
+// fMP4 segments a little ahead of playback, choosing for each the highest rendition that the
+// measured throughput sustains. Either way the player keeps the interview's own timeline, so
+// clips aren't needed; anything unsupported or failing falls back to the single file.
+var HLS_MIME = 'audio/mp4; codecs="mp4a.40.2"';
+var HLS_BUFFER_AHEAD = 30;   // seconds fetched ahead of the playhead
+var HLS_BUFFER_BEHIND = 30;  // seconds kept behind it (SourceBuffer quotas are small for audio)
+var HLS_SAFETY = 0.7;        // fraction of measured throughput a rendition may use
+var hls = null;
+
+// Playlist lines other than comments and tags, resolved against the playlist's URL, each with
+// the tag line just before it
+function playlistEntries(text, url) {
+    var entries = [];
+    var previous = "";
+    text.split(/\r?\n/).forEach(function(line) {
+        line = line.trim();
+        if (line && line.charAt(0) !== "#") {
+            entries.push({ tag: previous, uri: new URL(line, url).href });
+        }
+        if (line) {
+            previous = line;
+        }
+    });
+    return entries;
+}
+
+function fetchText(url) {
+    return fetch(url).then(function(response) {
+        if (!response.ok) {
+            throw new Error(response.status);
+        }
+        return response.text();
+    });
+}
+
+function loadRendition(entry) {
+    return fetchText(entry.uri).then(function(text) {
+        var init = text.match(/#EXT-X-MAP:URI="([^"]+)"/);
+        var start = 0;
+        var segments = playlistEntries(text, entry.uri).map(function(segment) {
+            var duration = parseFloat(segment.tag.replace("#EXTINF:", ""));
+            segment = { uri: segment.uri, start: start, duration: duration };
+            start += duration;
+            return segment;
+        });
+        return {
+            bandwidth: parseInt((entry.tag.match(/BANDWIDTH=(\d+)/) || [0, 0])[1], 10),
+            init: init ? new URL(init[1], entry.uri).href : "",
+            segments: segments,
+        };
+    });
+}
+
+function startHls(masterUrl) {
+    fetchText(masterUrl)
+        .then(function(text) {
+            return Promise.all(playlistEntries(text, new URL(masterUrl, location.href).href).map(loadRendition));
+        })
+        .then(function(renditions) {
+            renditions.sort(function(a, b) { return a.bandwidth - b.bandwidth; });
+            // The listener may already be playing the fallback source, or have jumped somewhere
+            var resumeAt = audioTime();
+            var resume = !audioPlayer.paused;
+            var mediaSource = new MediaSource();
+            hls = {
+                renditions: renditions,
+                // Renditions are cut at the same times; the lowest one's timeline indexes them all
+                segments: renditions[0].segments,
+                mediaSource: mediaSource,
+                sourceBuffer: null,
+                next: 0,
+                appendedRendition: -1,
+                throughput: 0,
+                busy: false,
+                generation: 0,
+            };
+            hls.next = segmentAt(resumeAt);
+            mediaSource.addEventListener("sourceopen", function() {
+                var last = hls.segments[hls.segments.length - 1];
+                hls.sourceBuffer = mediaSource.addSourceBuffer(HLS_MIME);
+                mediaSource.duration = last.start + last.duration;
+                hls.sourceBuffer.addEventListener("updateend", pumpHls);
+                pumpHls();
+            }, { once: true });
+            switchSource(URL.createObjectURL(mediaSource), resumeAt, resume);
+        })
+        .catch(hlsFailed);
+}
+
+// Without a usable ladder the page keeps what it has: clips or the full file if the playlists
+// never loaded, otherwise the full file from the current position
+function hlsFailed() {
+    if (hls) {
+        hls = null;
+        playFullRecording(audioTime());
+    }
+}
+
+// Highest rendition whose bandwidth fits the measured throughput; the lowest until measured
+function chooseRendition() {
+    var choice = 0;
+    hls.renditions.forEach(function(rendition, i) {
+        if (rendition.bandwidth <= hls.throughput * HLS_SAFETY) {
+            choice = i;
+        }
+    });
+    return choice;
+}
+
+// Fetch a segment, folding its transfer rate into the throughput estimate (bits/s, smoothed)
+function fetchMeasured(url) {
+    var started = performance.now();
+    return fetch(url)
+        .then(function(response) {
+            if (!response.ok) {
+                throw new Error(response.status);
+            }
+            return response.arrayBuffer();
+        })
+        .then(function(data) {
+            var seconds = Math.max((performance.now() - started) / 1000, 0.001);
+            var rate = data.byteLength * 8 / seconds;
+            hls.throughput = hls.throughput ? 0.7 * hls.throughput + 0.3 * rate : rate;
+            return data;
+        });
+}
+
+function appendSegment(data) {
+    return new Promise(function(resolve) {
+        hls.sourceBuffer.addEventListener("updateend", resolve, { once: true });
+        hls.sourceBuffer.appendBuffer(data);
+    });
+}
+
+function bufferedAhead() {
+    var buffered = hls.sourceBuffer.buffered;
+    var now = audioPlayer.currentTime;
+    for (var i = 0; i < buffered.length; i++) {
+        if (buffered.start(i) <= now + 0.1 && buffered.end(i) >= now) {
+            return buffered.end(i) - now;
+        }
+    }
+    return 0;
+}
+
+function pumpHls() {
+    if (!hls || !hls.sourceBuffer || hls.busy || hls.sourceBuffer.updating) {
+        return;
+    }
+    var buffer = hls.sourceBuffer;
+    var now = audioPlayer.currentTime;
+    if (buffer.buffered.length && buffer.buffered.start(0) < now - 2 * HLS_BUFFER_BEHIND) {
+        buffer.remove(0, now - HLS_BUFFER_BEHIND);  // pumpHls runs again on updateend
+        return;
+    }
+    if (hls.next >= hls.segments.length) {
+        if (hls.mediaSource.readyState === "open") {
+            hls.mediaSource.endOfStream();
+        }
+        return;
+    }
+    if (bufferedAhead() > HLS_BUFFER_AHEAD) {
+        return;
+    }
+
+    var index = hls.next;
+    var generation = hls.generation;
+    var renditionIndex = chooseRendition();
+    var rendition = hls.renditions[renditionIndex];
+    // A new rendition's init segment goes in before its first media segment
+    var init = (renditionIndex !== hls.appendedRendition) ? fetchMeasured(rendition.init) : Promise.resolve(null);
+    hls.busy = true;
+    init
+        .then(function(initData) {
+            return fetchMeasured(rendition.segments[index].uri).then(function(data) {
+                // Dropped if the listener seeked elsewhere meanwhile
+                if (!hls || generation !== hls.generation) {
+                    return null;
+                }
+                return (initData ? appendSegment(initData) : Promise.resolve()).then(function() {
+                    hls.appendedRendition = renditionIndex;
+                    return appendSegment(data);
+                });
+            });
+        })
+        .then(function() {
+            // A seek meanwhile has already started its own fetch
+            if (hls && generation === hls.generation) {
+                hls.next = index + 1;
+                hls.busy = false;
+                pumpHls();
+            }
+        })
+        .catch(hlsFailed);
+}
+
+// Index of the segment playing at the given time
+function segmentAt(seconds) {
+    return Math.max(0, lastAtOrBefore(hls.segments.length, function(k) { return hls.segments[k].start; }, seconds));
+}
+
+audioPlayer.addEventListener("timeupdate", pumpHls);
+audioPlayer.addEventListener("seeking", function() {
+    if (hls && hls.sourceBuffer && bufferedAhead() === 0) {
+        hls.generation++;
+        hls.next = segmentAt(audioPlayer.currentTime);
+        hls.busy = false;
+        pumpHls();
+    }
+});
+audioPlayer.addEventListener("error", function() {
+    if (hls) {
+        hlsFailed();
+    }
+});
+
+if (pageData.audioHls) {
+    if (audioPlayer.canPlayType("application/vnd.apple.mpegurl")) {
+        switchSource(pageData.audioHls, audioTime(), !audioPlayer.paused);
+        audioPlayer.addEventListener("error", function() {
+            if (audioPlayer.src.indexOf(".m3u8") !== -1) {
+                playFullRecording(audioTime());
+            }
+        });
+    } else if (window.MediaSource && MediaSource.isTypeSupported(HLS_MIME) && window.fetch) {
+        startHls(pageData.audioHls);
+    }
+}
+
+// Update TOC: highlight current section in whichever TOC is visible
+function updateToc() {
+    var currentLang = document.getElementById("toc-es").style.display === "none" ? "en" : "es";
+    var points = (currentLang === "en") ? mainPointsEn : mainPointsEs;
+    var prefix = (currentLang === "en") ? "-en" : "-es";
+    var containerId = (currentLang === "en") ? "toc-en" : "toc-es";
+    var tocContainer = document.getElementById(containerId);
+
+    points.forEach(function(pt) {
+        var entry = document.getElementById("link-" + pt.id + prefix);
+        if (entry) {
+            if (pt.id === currentSectionId) {
+                entry.style.color = "black";
+                var containerRect = tocContainer.getBoundingClientRect();
+                var entryRect = entry.getBoundingClientRect();
+                if (entryRect.top < containerRect.top || entryRect.bottom > containerRect.bottom) {
+                    entry.scrollIntoView({ behavior: "smooth", block: "nearest" });
+                }
+            } else {
+                entry.style.color = "gray";
+            }
+        }
+    });
+}
+
+// Helper: point an <img> (inside a <picture>) at an image's pre-built variants, letting the
+// browser pick the format and width from the <source> types, srcset and sizes
+function setPictureSources(img, imgObj) {
+    var picture = img.parentNode;
+    var oldSources = picture.getElementsByTagName("source");
+    while (oldSources.length) {
+        picture.removeChild(oldSources[0]);
+    }
+    (imgObj.sources || []).forEach(function(source) {
+        var el = document.createElement("source");
+        el.type = source.type;
+        el.srcset = source.srcset;
+        el.sizes = img.sizes;
+        picture.insertBefore(el, img);
+    });
+    if (imgObj.srcset) {
+        img.srcset = imgObj.srcset;
+    } else {
+        img.removeAttribute("srcset");
+    }
+    img.src = imgObj.src;
+}
+
+function showResponsiveImage(img, imgObj) {
+    // Reserve the final box from the build-time dimensions and paint the placeholder
+    // until the real image has decoded
+    if (imgObj.width && imgObj.height) {
+        img.width = imgObj.width;
+        img.height = imgObj.height;
+    } else {
+        img.removeAttribute("width");
+        img.removeAttribute("height");
+    }
+    img.style.backgroundColor = imgObj.placeholder ? "" : (imgObj.color || "");
+    img.style.backgroundImage = imgObj.placeholder ? "url(" + imgObj.placeholder + ")" : "";
+    img.onload = function() {
+        img.style.backgroundColor = "";
+        img.style.backgroundImage = "";
+    };
+    setPictureSources(img, imgObj);
+}
+
+// Predictive preloading: while the audio plays, fetch the images of the next few sections
+// at low priority, choosing the same variant #current-image would. The cache is bounded
+// so long interviews don't keep every decoded image alive.
+var PRELOAD_AHEAD = 2;
+var PRELOAD_CACHE_SIZE = 4;
+var preloadCache = new Map();
+var lastPreloadIndex = -1;
+
+function preloadImage(key) {
+    if (preloadCache.has(key)) {
+        // Refresh its position in the LRU order
+        var cached = preloadCache.get(key);
+        preloadCache.delete(key);
+        preloadCache.set(key, cached);
+        return;
+    }
+    var picture = document.createElement("picture");
+    var img = document.createElement("img");
+    img.sizes = document.getElementById("current-image").sizes;
+    img.decoding = "async";
+    img.setAttribute("fetchpriority", "low");
+    picture.appendChild(img);
+    setPictureSources(img, sectionImages[key]);
+    preloadCache.set(key, img);
+    if (preloadCache.size > PRELOAD_CACHE_SIZE) {
+        preloadCache.delete(preloadCache.keys().next().value);
+    }
+}
+
+function preloadUpcomingImages(currentTime) {
+    var lo = firstImageSectionAfter(currentTime);
+    if (lo === lastPreloadIndex) {
+        return;
+    }
+    lastPreloadIndex = lo;
+    var seen = {};
+    for (var i = lo; i < imageSections.length && Object.keys(seen).length < PRELOAD_AHEAD; i++) {
+        var key = sectionsById[imageSections[i]].image;
+        if (!seen[key]) {
+            seen[key] = true;
+            preloadImage(key);
+        }
+    }
+}
+
+audioPlayer.addEventListener("timeupdate", function() {
+    preloadUpcomingImages(audioTime());
+});
+
+// Helper: update the gallery-full image
+function updateGalleryImage(sectionId) {
+    var point = sectionsById[sectionId];
+    if (point && point.hasOwnProperty("image") && sectionImages.hasOwnProperty(point.image)) {
+        showResponsiveImage(document.getElementById("gallery-full"), sectionImages[point.image]);
+        var fullText = sectionImages[point.image].textContent;
+        var titleText = fullText.split(".")[0];
+        document.getElementById("gallery-full-title").textContent = titleText;
+        document.getElementById("gallery-full-subtitle").textContent = fullText;
+    }
+}
+
+// Index of the first image section starting after the given time (binary search)
+function firstImageSectionAfter(seconds) {
+    var lo = 0, hi = imageSections.length;
+    while (lo < hi) {
+        var mid = (lo + hi) >> 1;
+        if (sectionsById[imageSections[mid]].start_time <= seconds) {
+            lo = mid + 1;
+        } else {
+            hi = mid;
+        }
+    }
+    return lo;
+}
+
+function showImageSection(index) {
+    if (index < 0 || index >= imageSections.length) {
+        return;
+    }
+    currentSectionId = imageSections[index];
+    updateImageForSection(currentSectionId);
+    updateToc();
+}
+
+// Next/Prev image on main page: a step through imageSections from the current section
+function prevImage() {
+    if (imageSectionIndex.hasOwnProperty(currentSectionId)) {
+        showImageSection(imageSectionIndex[currentSectionId] - 1);
+    } else if (sectionsById[currentSectionId]) {
+        // Current section has no image: the last image section at or before it
+        showImageSection(firstImageSectionAfter(sectionsById[currentSectionId].start_time) - 1);
+    }
+}
+
+function nextImage() {
+    if (imageSectionIndex.hasOwnProperty(currentSectionId)) {
+        showImageSection(imageSectionIndex[currentSectionId] + 1);
+    } else if (sectionsById[currentSectionId]) {
+        showImageSection(firstImageSectionAfter(sectionsById[currentSectionId].start_time));
+    } else {
+        showImageSection(0);
+    }
+}
+
+function updateImageForSection(sectionId) {
+    var point = sectionsById[sectionId];
+    if (point && point.hasOwnProperty("image") && sectionImages.hasOwnProperty(point.image)) {
+        showResponsiveImage(document.getElementById("current-image"), sectionImages[point.image]);
+        document.getElementById("image-subtitle").textContent = sectionImages[point.image].textContent;
+    }
+}
+
+// TOC toggle logic
+function showToc(lang) {
+    if (lang === "english") {
+        document.getElementById("toc-en").style.display = "block";
+        document.getElementById("toc-es").style.display = "none";
+    } else {
+        document.getElementById("toc-en").style.display = "none";
+        document.getElementById("toc-es").style.display = "block";
+    }
+    updateToc();
+}
+
+// Transcript toggle logic (only if both exist): move the shown transcript's nodes into its
+// template and the requested one's nodes into the <pre>, so each is in the page only once
+var transcriptPre = document.getElementById("transcript-pre");
+var currentTranscript = pageData.initialTranscript;
+function showTranscript(lang) {
+    var incoming = document.getElementById("transcript-" + lang);
+    var outgoing = document.getElementById("transcript-" + currentTranscript);
+    if (lang === currentTranscript || !incoming || !outgoing) {
+        return;
+    }
+    while (transcriptPre.firstChild) {
+        outgoing.content.appendChild(transcriptPre.firstChild);
+    }
+    transcriptPre.appendChild(incoming.content);
+    currentTranscript = lang;
+    anchorOffsets = null;
+    // The highlighted link went with the old transcript; clear it so it isn't stale on return
+    var highlighted = outgoing.content.querySelector(".current-utterance");
+    if (highlighted) {
+        highlighted.classList.remove("current-utterance");
+    }
+    currentUtteranceId = "";
+}
+
+// Audio jump function
+function jumpToTime(seconds) {
+    if (audioClips.length) {
+        var index = clipAt(seconds);
+        if (index !== currentClip) {
+            loadClip(index, seconds - audioClips[index].start, true);
+            return;
+        }
+        seconds -= audioClips[index].start;
+    }
+    // Until a new source's metadata is in, the position can only be remembered
+    if (pendingOffset !== null) {
+        pendingOffset = seconds;
+    } else {
+        audioPlayer.currentTime = seconds;
+    }
+    audioPlayer.play();
+}
+
+// Function to jump to a section
+function jumpToSection(sectionId, seconds) {
+    jumpToTime(seconds);
+    var anchor = document.getElementById(sectionId);
+    if (anchor) {
+        anchor.scrollIntoView({ behavior: "smooth", block: "start" });
+    }
+    currentSectionId = sectionId;
+    updateToc();
+    updateImageForSection(currentSectionId);
+}
+
+// Update TOC & image based on scroll position in transcript. Anchor offsets are measured
+// once (and again only after the transcript's layout changes); each scroll then costs one
+// binary search, at most once per animation frame.
+var scrollDiv = document.getElementById("right-column");
+var anchorOffsets = null;
+var scrollFrame = 0;
+// "Seguir el audio": while it is on and the audio plays, the audio decides the current section
+// and the transcript scrolls with it; scrolling by hand turns it off
+var followToggle = document.getElementById("follow-audio-toggle");
+var SCROLL_KEYS = ["ArrowUp", "ArrowDown", "PageUp", "PageDown", "Home", "End", " "];
+
+function followingAudio() {
+    return followToggle.checked && !audioPlayer.paused;
+}
+
+function stopFollowing() {
+    followToggle.checked = false;
+}
+
+function measureAnchorOffsets() {
+    var originTop = scrollDiv.getBoundingClientRect().top - scrollDiv.scrollTop;
+    var anchors = transcriptPre.getElementsByClassName("section-anchor");
+    anchorOffsets = [];
+    for (var i = 0; i < anchors.length; i++) {
+        anchorOffsets.push({ id: anchors[i].id, top: anchors[i].getBoundingClientRect().top - originTop });
+    }
+    anchorOffsets.sort(function(a, b) { return a.top - b.top; });
+}
+
+// Section whose anchor is closest to the top of the scrolled view
+function sectionAtScrollTop(scrollTop) {
+    var lo = 0, hi = anchorOffsets.length;
+    while (lo < hi) {
+        var mid = (lo + hi) >> 1;
+        if (anchorOffsets[mid].top < scrollTop) {
+            lo = mid + 1;
+        } else {
+            hi = mid;
+        }
+    }
+    var best = null;
+    [lo - 1, lo].forEach(function(i) {
+        if (i >= 0 && i < anchorOffsets.length &&
+            (!best || Math.abs(anchorOffsets[i].top - scrollTop) < Math.abs(best.top - scrollTop))) {
+            best = anchorOffsets[i];
+        }
+    });
+    return best ? best.id : "";
+}
+
+if (scrollDiv) {
+    scrollDiv.addEventListener("scroll", function() {
+        if (scrollFrame) {
+            return;
+        }
+        scrollFrame = requestAnimationFrame(function() {
+            scrollFrame = 0;
+            // Scrolls made by the audio sync itself don't move the section away from the audio
+            if (followingAudio()) {
+                return;
+            }
+            if (!anchorOffsets) {
+                measureAnchorOffsets();
+            }
+            var closestSectionId = sectionAtScrollTop(scrollDiv.scrollTop);
+            if (closestSectionId && closestSectionId !== currentSectionId) {
+                currentSectionId = closestSectionId;
+                updateToc();
+                updateImageForSection(currentSectionId);
+            }
+        });
+    }, { passive: true });
+
+    scrollDiv.addEventListener("wheel", stopFollowing, { passive: true });
+    scrollDiv.addEventListener("touchmove", stopFollowing, { passive: true });
+    scrollDiv.addEventListener("keydown", function(event) {
+        if (SCROLL_KEYS.indexOf(event.key) !== -1) {
+            stopFollowing();
+        }
+    });
+    // Dragging the scrollbar (clicks inside the transcript, e.g. on timestamps, don't count)
+    scrollDiv.addEventListener("mousedown", function(event) {
+        if (event.target === scrollDiv && event.offsetX >= scrollDiv.clientWidth) {
+            stopFollowing();
+        }
+    });
+
+    // Re-measure lazily after resizes, font loading or a transcript language switch
+    if (window.ResizeObserver) {
+        new ResizeObserver(function() { anchorOffsets = null; }).observe(transcriptPre);
+    } else {
+        window.addEventListener("resize", function() { anchorOffsets = null; });
+    }
+}
+
+// Audio -> transcript sync: on each timeupdate, binary-search the current transcript's
+// timestamp index and the section order; the DOM is only touched when either changes.
+var currentUtteranceId = "";
+var audioSectionId = "";
+
+// Index of the last entry whose time is <= seconds, or -1
+function lastAtOrBefore(length, timeAt, seconds) {
+    var lo = 0, hi = length;
+    while (lo < hi) {
+        var mid = (lo + hi) >> 1;
+        if (timeAt(mid) <= seconds) {
+            lo = mid + 1;
+        } else {
+            hi = mid;
+        }
+    }
+    return lo - 1;
+}
+
+function syncTranscriptToAudio(seconds) {
+    var pairs = timestampIndex[currentTranscript] || [];
+    var i = lastAtOrBefore(pairs.length, function(k) { return pairs[k][0]; }, seconds);
+    var utteranceId = (i >= 0) ? pairs[i][1] : "";
+    var follow = followToggle.checked;
+    if (utteranceId !== currentUtteranceId) {
+        var previous = currentUtteranceId && document.getElementById(currentUtteranceId);
+        if (previous) {
+            previous.classList.remove("current-utterance");
+        }
+        currentUtteranceId = utteranceId;
+        var current = utteranceId && document.getElementById(utteranceId);
+        if (current) {
+            current.classList.add("current-utterance");
+            if (follow) {
+                current.scrollIntoView({ behavior: "smooth", block: "center" });
+            }
+        }
+    }
+
+    var j = lastAtOrBefore(sectionOrder.length, function(k) {
+        return sectionsById[sectionOrder[k]].start_time;
+    }, seconds);
+    var sectionId = (j >= 0) ? sectionOrder[j] : "";
+    if (sectionId !== audioSectionId) {
+        audioSectionId = sectionId;
+        if (follow && sectionId && sectionId !== currentSectionId) {
+            currentSectionId = sectionId;
+            updateToc();
+            updateImageForSection(currentSectionId);
+        }
+    }
+}
+
+audioPlayer.addEventListener("timeupdate", function() {
+    syncTranscriptToAudio(audioTime());
+});
+// Turning following back on returns to where the audio is
+followToggle.addEventListener("change", function() {
+    if (followToggle.checked) {
+        var current = currentUtteranceId && document.getElementById(currentUtteranceId);
+        if (current) {
+            current.scrollIntoView({ behavior: "smooth", block: "center" });
+        }
+        audioSectionId = "";
+        syncTranscriptToAudio(audioTime());
+    }
+});
+
+// Waveform timeline: min/max peaks precomputed by the build are drawn once per canvas size into
+// two offscreen layers (unplayed and played colours, both with section markers), and each
+// timeupdate composites them at the playhead. Clicking seeks; clicking a marker jumps to its
+// section.
+var WAVEFORM_COLOR = "#bbb";
+var WAVEFORM_PLAYED_COLOR = "#555";
+var WAVEFORM_MARKER_COLOR = "#c0392b";
+var WAVEFORM_MARKER_HIT = 4;  // CSS pixels either side of a marker that still select it
+var waveform = null;
+
+function loadWaveform(canvas, url) {
+    fetch(url)
+        .then(function(response) {
+            if (!response.ok) {
+                throw new Error(response.status);
+            }
+            return response.arrayBuffer();
+        })
+        .then(function(buffer) {
+            // Header: "PEAK", uint16 buckets per second, uint32 bucket count (little-endian)
+            var view = new DataView(buffer);
+            var magic = String.fromCharCode(view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3));
+            if (magic !== "PEAK") {
+                throw new Error("not a peaks file");
+            }
+            var count = view.getUint32(6, true);
+            waveform = {
+                canvas: canvas,
+                peaks: new Int8Array(buffer, 10, count * 2),
+                duration: count / view.getUint16(4, true),
+                unplayed: null,
+                played: null,
+                playheadX: -1,
+            };
+            renderWaveform();
+            if (window.ResizeObserver) {
+                new ResizeObserver(renderWaveform).observe(canvas);
+            } else {
+                window.addEventListener("resize", renderWaveform);
+            }
+        })
+        .catch(function() {
+            canvas.style.display = "none";
+        });
+}
+
+function drawWaveformLayer(width, height, color) {
+    var layer = document.createElement("canvas");
+    layer.width = width;
+    layer.height = height;
+    var ctx = layer.getContext("2d");
+    var peaks = waveform.peaks;
+    var buckets = peaks.length / 2;
+    var mid = height / 2;
+    ctx.fillStyle = color;
+    for (var x = 0; x < width; x++) {
+        var from = Math.floor(x * buckets / width);
+        var to = Math.max(from + 1, Math.floor((x + 1) * buckets / width));
+        var lo = 0, hi = 0;
+        for (var i = from; i < to && i < buckets; i++) {
+            lo = Math.min(lo, peaks[2 * i]);
+            hi = Math.max(hi, peaks[2 * i + 1]);
+        }
+        var top = mid - hi / 128 * mid;
+        ctx.fillRect(x, top, 1, Math.max(1, mid - lo / 128 * mid - top));
+    }
+    ctx.fillStyle = WAVEFORM_MARKER_COLOR;
+    var markerWidth = Math.max(1, Math.round(window.devicePixelRatio || 1));
+    sectionOrder.forEach(function(id) {
+        ctx.fillRect(Math.round(sectionsById[id].start_time / waveform.duration * width), 0, markerWidth, height);
+    });
+    return layer;
+}
+
+function renderWaveform() {
+    var canvas = waveform.canvas;
+    var ratio = window.devicePixelRatio || 1;
+    var width = Math.round(canvas.clientWidth * ratio);
+    var height = Math.round(canvas.clientHeight * ratio);
+    if (!width || !height) {
+        return;
+    }
+    canvas.width = width;
+    canvas.height = height;
+    waveform.unplayed = drawWaveformLayer(width, height, WAVEFORM_COLOR);
+    waveform.played = drawWaveformLayer(width, height, WAVEFORM_PLAYED_COLOR);
+    waveform.playheadX = -1;
+    drawWaveformPlayhead(audioTime());
+}
+
+function drawWaveformPlayhead(seconds) {
+    if (!waveform || !waveform.played) {
+        return;
+    }
+    var width = waveform.canvas.width, height = waveform.canvas.height;
+    var x = Math.round(Math.min(1, seconds / waveform.duration) * width);
+    if (x === waveform.playheadX) {
+        return;
+    }
+    waveform.playheadX = x;
+    var ctx = waveform.canvas.getContext("2d");
+    ctx.clearRect(0, 0, width, height);
+    if (x > 0) {
+        ctx.drawImage(waveform.played, 0, 0, x, height, 0, 0, x, height);
+    }
+    if (x < width) {
+        ctx.drawImage(waveform.unplayed, x, 0, width - x, height, x, 0, width - x, height);
+    }
+}
+
+// Section whose marker is within WAVEFORM_MARKER_HIT pixels of x (CSS pixels), if any
+function waveformMarkerAt(x, width) {
+    var seconds = x / width * waveform.duration;
+    var j = lastAtOrBefore(sectionOrder.length, function(k) {
+        return sectionsById[sectionOrder[k]].start_time;
+    }, seconds);
+    var best = "";
+    var bestDistance = WAVEFORM_MARKER_HIT;
+    [j, j + 1].forEach(function(k) {
+        if (k >= 0 && k < sectionOrder.length) {
+            var distance = Math.abs(sectionsById[sectionOrder[k]].start_time / waveform.duration * width - x);
+            if (distance <= bestDistance) {
+                best = sectionOrder[k];
+                bestDistance = distance;
+            }
+        }
+    });
+    return best;
+}
+
+function formatTime(seconds) {
+    seconds = Math.floor(seconds);
+    var pad = function(n) { return (n < 10 ? "0" : "") + n; };
+    return Math.floor(seconds / 3600) + ":" + pad(Math.floor(seconds / 60) % 60) + ":" + pad(seconds % 60);
+}
+
+var waveformCanvas = document.getElementById("waveform");
+if (waveformCanvas && pageData.waveformPeaks) {
+    waveformCanvas.addEventListener("click", function(event) {
+        if (!waveform) {
+            return;
+        }
+        var rect = waveformCanvas.getBoundingClientRect();
+        var x = event.clientX - rect.left;
+        var marker = waveformMarkerAt(x, rect.width);
+        if (marker) {
+            jumpToSection(marker, sectionsById[marker].start_time);
+        } else {
+            jumpToTime(x / rect.width * waveform.duration);
+        }
+    });
+    waveformCanvas.addEventListener("mousemove", function(event) {
+        if (!waveform) {
+            return;
+        }
+        var rect = waveformCanvas.getBoundingClientRect();
+        var x = event.clientX - rect.left;
+        var marker = waveformMarkerAt(x, rect.width);
+        waveformCanvas.title = marker ? sectionsById[marker].title : formatTime(x / rect.width * waveform.duration);
+    });
+    audioPlayer.addEventListener("timeupdate", function() {
+        drawWaveformPlayhead(audioTime());
+    });
+    loadWaveform(waveformCanvas, pageData.waveformPeaks);
+}
+
+// Current section starts at the first Spanish section if available, otherwise English
+var currentSectionId = (mainPointsEs.length > 0) ? mainPointsEs[0].id
+                        : (mainPointsEn.length > 0) ? mainPointsEn[0].id
+                        : "";
+// Initialize TOC & image
+showToc("spanish");
+updateImageForSection(currentSectionId);
+
+// Open gallery popup
+function openGallery() {
+    document.getElementById("gallery-popup").style.display = "block";
+    updateGalleryImage(currentSectionId);
+    loadGalleryImages(populateGalleryThumbnails);
+}
+
+// Fetch the archive-wide gallery manifest the first time the gallery opens; fall back to
+// this page's own images if it can't be fetched (e.g. when opened from file://)
+function loadGalleryImages(callback) {
+    if (galleryImages) {
+        callback(galleryImages);
+        return;
+    }
+    fetch(galleryManifestUrl)
+        .then(function(response) {
+            if (!response.ok) {
+                throw new Error(response.status);
+            }
+            return response.json();
+        })
+        .then(function(images) {
+            galleryImages = images;
+            callback(galleryImages);
+        })
+        .catch(function() {
+            callback(sectionImages);
+        });
+}
+
+// Close gallery popup
+function closeGallery() {
+    document.getElementById("gallery-popup").style.display = "none";
+}
+
+// Populate gallery thumbnails
+function populateGalleryThumbnails(images) {
+    var thumbsPane = document.getElementById("gallery-thumbs-pane");
+    thumbsPane.innerHTML = "";
+    Object.keys(images).forEach(function(key) {
+        var imgObj = images[key];
+        var thumb = document.createElement("img");
+        // Small pre-built thumbnail when available; the full image loads only once selected
+        thumb.src = imgObj.thumb || imgObj.src;
+        thumb.loading = "lazy";
+        thumb.onclick = function() {
+            showResponsiveImage(document.getElementById("gallery-full"), imgObj);
+            document.getElementById("gallery-full-title").textContent = imgObj.textContent.split(".")[0];
+            document.getElementById("gallery-full-subtitle").textContent = imgObj.textContent;
+            var allThumbs = thumbsPane.getElementsByTagName("img");
+            for (var i = 0; i < allThumbs.length; i++) {
+                allThumbs[i].classList.remove("selected");
+            }
+            thumb.classList.add("selected");
+        };
+        if (sectionByImage[key] === currentSectionId) {
+            thumb.classList.add("selected");
+        }
+        thumbsPane.appendChild(thumb);
+    });
+}
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# Structured transcript model shared by make_html14_multilingual_scroll_text.py and the
+# analysis tools: each transcripts/*.txt file is parsed once into its classified lines and a
+# list of utterances, and the result is cached on disk keyed by a hash of the file, the cast of
+# speakers it was parsed against and the model version, so later stages load the cached model
+# instead of re-running the regexes. The page writer instead streams the classified lines
+# straight from the file (iter_transcript), so its memory doesn't grow with the transcript.
+#
+# Model (plain JSON):
+#   "lines":      [kind, line, value] for every line of the file, line endings kept; value is
+#                 the timestamp text for timestamp lines, the speaker name for speaker lines
+#   "utterances": {"speaker", "seconds", "display_time", "text", "lines": [first, last]}, one per
+#                 speaker line, or per timestamp that begins a new stretch of the same speaker;
+#                 line numbers are 1-based and inclusive
+import io
+import os
+import re
+import json
+import hashlib
+from functools import lru_cache
+
+# Bump when the model's shape or the parsing rules change; part of every cache key
+MODEL_VERSION = 1
+CACHE_DIR = ".transcript_cache"
+
+# --- Regular Expression for Timestamp Lines ---
+timestamp_re = re.compile(r"^\d+:\d{2}:\d{2}$")
+
+def timestamp_to_seconds(ts_str):
+    parts = ts_str.strip().split(":")
+    if len(parts) != 3:
+        return None
+    try:
+        hours, minutes, seconds = map(int, parts)
+        return hours * 3600 + minutes * 60 + seconds
+    except ValueError:
+        return None
+
+@lru_cache(maxsize=None)
+def compile_speaker_re(names):
+    # One alternation for the whole cast; longest names first so "Jaime K" wins over "Jaime".
+    if not names:
+        return re.compile(r"(?!)")
+    ordered = sorted(names, key=len, reverse=True)
+    return re.compile("^(" + "|".join(re.escape(name) for name in ordered) + ")")
+
+# Line kinds produced by tokenize_transcript
+LINE_BLANK, LINE_TIMESTAMP, LINE_SPEAKER, LINE_TEXT = "blank", "timestamp", "speaker", "text"
+
+def tokenize_transcript(lines, speaker_re):
+    """Classify each transcript line once, yielding (kind, line, match)."""
+    for line in lines:
+        body = line.rstrip("\n")
+        if not body.strip():
+            yield LINE_BLANK, line, None
+            continue
+        match = timestamp_re.match(body)
+        if match:
+            yield LINE_TIMESTAMP, line, match
+            continue
+        match = speaker_re.match(body)
+        if match:
+            yield LINE_SPEAKER, line, match
+        else:
+            yield LINE_TEXT, line, None
+
+def line_value(kind, match):
+    # The model's value for a classified line: timestamp text, speaker name, or None
+    if kind == LINE_TIMESTAMP:
+        return match.group(0)
+    if kind == LINE_SPEAKER:
+        return match.group(1)
+    return None
+
+def iter_transcript(file_path, speaker_names):
+    """Yield the model's [kind, line, value] lines for file_path as the file is read."""
+    speaker_re = compile_speaker_re(tuple(speaker_names))
+    with open(file_path, "r", encoding="utf-8") as f:
+        for kind, line, match in tokenize_transcript(f, speaker_re):
+            yield kind, line, line_value(kind, match)
+
+def parse_transcript(lines, speaker_names):
+    """Build the model from the transcript's lines."""
+    model_lines = []
+    utterances = []
+    current = None
+
+    def start(speaker, line_number):
+        utterance = {"speaker": speaker, "seconds": None, "display_time": None, "text": "",
+                     "lines": [line_number, line_number]}
+        utterances.append(utterance)
+        return utterance
+
+    speaker_re = compile_speaker_re(tuple(speaker_names))
+    for number, (kind, line, match) in enumerate(tokenize_transcript(lines, speaker_re), 1):
+        value = line_value(kind, match)
+        if kind == LINE_SPEAKER:
+            current = start(value, number)
+        elif kind == LINE_TIMESTAMP:
+            # A timestamp after the utterance already has one (or some text) begins a new
+            # stretch by the same speaker
+            if current is None or current["display_time"] is not None or current["text"]:
+                current = start(current["speaker"] if current else None, number)
+            current["seconds"] = timestamp_to_seconds(value)
+            current["display_time"] = value
+            current["lines"][1] = number
+        elif kind == LINE_TEXT:
+            if current is None:
+                current = start(None, number)
+            text = line.rstrip("\n")
+            current["text"] = f"{current['text']}\n{text}" if current["text"] else text
+            current["lines"][1] = number
+        model_lines.append([kind, line, value])
+    return {"version": MODEL_VERSION, "lines": model_lines, "utterances": utterances}
+
+def cache_path(file_path, data, speaker_names):
+    key = hashlib.sha256(data)
+    key.update(json.dumps([sorted(speaker_names), MODEL_VERSION]).encode("utf-8"))
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(CACHE_DIR, f"{stem}-{key.hexdigest()[:16]}.json")
+
+def load_transcript(file_path, speaker_names):
+    """The model for file_path, from the cache when the file and cast are unchanged."""
+    with open(file_path, "rb") as f:
+        data = f.read()
+    path = cache_path(file_path, data, speaker_names)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    # Read back exactly as a text-mode open() would (same newline translation and splitting)
+    model = parse_transcript(io.TextIOWrapper(io.BytesIO(data), encoding="utf-8"), speaker_names)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(model, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    # Drop this transcript's entries for earlier versions of the file
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    stale = re.compile(re.escape(stem) + r"-[0-9a-f]{16}\.json")
+    for name in os.listdir(CACHE_DIR):
+        if stale.fullmatch(name) and name != os.path.basename(path):
+            os.remove(os.path.join(CACHE_DIR, name))
+    return model
+
+def speaker_turns(model):
+    """(seconds, speaker) for each timed utterance whose speaker differs from the previous one."""
+    turns = []
+    previous = None
+    for utterance in model["utterances"]:
+        if utterance["seconds"] is not None and utterance["speaker"] and utterance["speaker"] != previous:
+            turns.append((utterance["seconds"], utterance["speaker"]))
+            previous = utterance["speaker"]
+    return sorted(turns)
+
+def timestamps(model):
+    """Sorted distinct times of the transcript's timestamp lines."""
+    return sorted({u["seconds"] for u in model["utterances"] if u["seconds"] is not None})